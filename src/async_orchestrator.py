@@ -0,0 +1,136 @@
+"""
+asyncio オーケストレーター
+
+1つのプロセス・1つのイベントループで多数のブラウザセッションを並行に動かす
+- 各セッションはコルーチンで、共有キューからセクションを取り出して再生する
+- Selenium のブロッキング呼び出しは上限付きのスレッドプールで実行する
+- 待機・ポーリング間隔は asyncio.sleep で待つため、待機中のセッションはスレッドを占有しない
+- Ctrl+C で全セッションをキャンセルし、ブラウザを閉じて終了する
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _step(steps):
+    """
+    ジェネレーターを1ステップ進める（executor 内で実行）
+
+    StopIteration は Future に渡せないため、(終了したか, 値) の組で返す。
+    """
+    try:
+        return False, next(steps)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def _close_extra_windows(driver, home_handle):
+    """セクション再生中に開いたウィンドウを閉じて最初のウィンドウに戻る"""
+    for handle in driver.window_handles:
+        if handle != home_handle:
+            driver.switch_to.window(handle)
+            driver.close()
+    driver.switch_to.window(home_handle)
+
+
+class AsyncOrchestrator:
+    """セクション再生のジェネレーターをセッション（ブラウザ）ごとのコルーチンとして実行する"""
+
+    def __init__(self, session_count, create_driver, section_steps, executor_threads=4):
+        """
+        session_count: 同時に動かすブラウザセッション数
+        create_driver(name): ログイン済みのドライバーを返す（失敗時は None）
+        section_steps(driver, section_index, position, name): セクションを再生するジェネレーター（name はセッション名）
+            次の確認までの秒数を yield し、成否を return する
+        executor_threads: Selenium 呼び出しを実行するスレッド数の上限
+        """
+        self.session_count = session_count
+        self.create_driver = create_driver
+        self.section_steps = section_steps
+        self.executor_threads = executor_threads
+        self._executor = None
+
+    async def _call(self, func, *args):
+        """ブロッキング呼び出しをスレッドプールで実行して結果を待つ"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _drive(self, steps):
+        """ジェネレーターを最後まで進め、戻り値を返す"""
+        while True:
+            done, value = await self._call(_step, steps)
+            if done:
+                return value
+            await asyncio.sleep(value)
+
+    async def _session(self, name, driver, work, results):
+        try:
+            if driver is None:
+                logging.info(f"🚀 {name}: ブラウザを起動します...")
+                driver = await self._call(self.create_driver, name)
+            if driver is None:
+                logging.error(f"❌ {name}: ブラウザの起動またはログインに失敗しました")
+                return
+            home_handle = await self._call(lambda: driver.current_window_handle)
+
+            while True:
+                try:
+                    position, section_index = work.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                logging.info(f"📋 {name}: セクション {section_index} を担当します")
+                steps = self.section_steps(driver, section_index, position, name)
+                try:
+                    ok = await self._drive(steps)
+                except asyncio.CancelledError:
+                    try:
+                        steps.close()
+                    except ValueError:
+                        pass  # executor で実行中のステップは閉じられない
+                    raise
+                except Exception as e:
+                    logging.error(f"❌ {name}: セクション {section_index} でエラー: {e}")
+                    ok = False
+                results[section_index] = ok
+                try:
+                    await self._call(_close_extra_windows, driver, home_handle)
+                except Exception as e:
+                    logging.debug(f"  {name}: ウィンドウを閉じる際のエラー: {e}")
+            logging.info(f"✅ {name}: 担当セクションがなくなったので終了します")
+        finally:
+            if driver:
+                try:
+                    await asyncio.shield(self._call(driver.quit))
+                except BaseException:
+                    pass
+
+    async def run(self, sections, first_driver=None):
+        """sections を並行に再生し、{セクション番号: ジェネレーターの戻り値} を返す"""
+        work = asyncio.Queue()
+        for position, section_index in enumerate(sections, 1):
+            work.put_nowait((position, section_index))
+        results = {}
+
+        self._executor = ThreadPoolExecutor(max_workers=self.executor_threads, thread_name_prefix='selenium')
+        try:
+            await asyncio.gather(*[
+                self._session(f'session-{i + 1}', first_driver if i == 0 else None, work, results)
+                for i in range(self.session_count)
+            ])
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+        for section_index in sections:
+            results.setdefault(section_index, False)
+        return results
+
+
+def run_async_sessions(sections, session_count, create_driver, section_steps, first_driver=None, executor_threads=4):
+    """
+    AsyncOrchestrator でセクションを並行に再生する（同期コードからの入口）
+
+    Ctrl+C では全セッションがキャンセルされ、ブラウザを閉じた後に KeyboardInterrupt が送出される。
+    """
+    orchestrator = AsyncOrchestrator(session_count, create_driver, section_steps, executor_threads)
+    return asyncio.run(orchestrator.run(sections, first_driver=first_driver))
@@ -0,0 +1,238 @@
+"""
+ブラウザデーモン
+
+ログイン済みの Chrome を常駐させ、リモートデバッグのエンドポイントを公開する
+各スクリプトは BROWSER_DAEMON（例: 127.0.0.1:9222）を設定すると、
+Chrome を起動する代わりにこのブラウザに接続する（起動・ログインの時間を省く）
+- BROWSER_DAEMON=auto の場合は、デーモンが書き出す状態ファイルから接続先を探す
+- 定期的にヘルスチェックを行い、Chrome が落ちていれば起動し直してログインし直す
+- Ctrl+C で Chrome を終了する
+
+使い方: python browser_daemon.py
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import subprocess
+import urllib.request
+from dotenv import load_dotenv
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.service import Service
+from driver_resolver import resolve_chromedriver, find_chrome_binary
+from session_share import is_logged_in
+from tab_pool import BACKGROUND_TAB_ARGUMENTS
+from process_reaper import ProcessReaper
+from process_utils import pid_exists
+
+
+# 各スクリプトの load_dotenv() より先に import されるため、ここで .env を読み込む
+load_dotenv()
+
+# 接続先のデーモン（スクリプト側の設定、未設定 = 接続せずに Chrome を起動する、auto = 状態ファイルから探す）
+BROWSER_DAEMON = os.getenv('BROWSER_DAEMON')
+
+# デーモン側の設定
+DAEMON_PORT = int(os.getenv('DAEMON_PORT', '9222'))
+DAEMON_PROFILE_DIR = os.path.abspath(os.getenv('DAEMON_PROFILE_DIR', os.path.join('profiles', 'daemon')))
+DAEMON_HEALTH_INTERVAL = float(os.getenv('DAEMON_HEALTH_INTERVAL', '15'))
+# 起動中のデーモンの接続先を書き出すファイル（BROWSER_DAEMON=auto で読む）
+DAEMON_STATE_FILE = 'browser_daemon.json'
+
+EMAIL = os.getenv('EMAIL')
+PASSWORD = os.getenv('PASSWORD')
+URL = 'https://letter.the-3rd-brain.com/members/C3sxfGdWUas4/course/UZr4qDbqxh9I'
+
+
+def endpoint_healthy(address, timeout=3):
+    """リモートデバッグのエンドポイントが応答するか"""
+    try:
+        with urllib.request.urlopen(f'http://{address}/json/version', timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+def discover_daemon():
+    """状態ファイルから起動中のデーモンの接続先を返す（デーモンが動いていない場合は None）"""
+    try:
+        with open(DAEMON_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # PID が記録されていない状態ファイルは、デーモンが動いていないものとして扱う
+    if not pid_exists(state.get('daemon_pid')):
+        return None
+    return state.get('address')
+
+
+def attach_driver(address=None, wait=30):
+    """
+    デーモンのブラウザに接続したドライバーを返す（接続できない場合は None）
+
+    address が 'auto' の場合は状態ファイルから接続先を探す。
+    デーモンが Chrome を起動し直している最中でも接続できるよう、最大 wait 秒待つ。
+    接続したドライバーで quit() しても Chrome は終了しない（chromedriver が起動したものではないため）。
+    """
+    address = address or BROWSER_DAEMON
+    if address == 'auto':
+        address = discover_daemon()
+        if address is None:
+            logging.warning(f"⚠️ 起動中のブラウザデーモンが見つかりません（{DAEMON_STATE_FILE}）。通常どおり Chrome を起動します")
+            return None
+    deadline = time.monotonic() + wait
+    while not endpoint_healthy(address):
+        if time.monotonic() >= deadline:
+            logging.warning(f"⚠️ ブラウザデーモン（{address}）に接続できません。通常どおり Chrome を起動します")
+            return None
+        time.sleep(1)
+
+    start = time.monotonic()
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option('debuggerAddress', address)
+    driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+    logging.info(f"🔌 ブラウザデーモン（{address}）に接続しました: {time.monotonic() - start:.1f}秒")
+    return driver
+
+
+def already_logged_in(driver, url):
+    """デーモンのブラウザがログイン済みか（確認できない場合は False でログイン処理に進む）"""
+    try:
+        if is_logged_in(driver, url):
+            logging.info("✅ ブラウザデーモンはログイン済みです（ログインを省略）")
+            return True
+    except Exception as e:
+        logging.debug(f"ログイン状態の確認エラー: {e}")
+    return False
+
+
+class BrowserDaemon:
+    """リモートデバッグ付きの Chrome を起動・監視する"""
+
+    def __init__(self, port=DAEMON_PORT, profile_dir=DAEMON_PROFILE_DIR):
+        self.port = port
+        self.profile_dir = profile_dir
+        self.address = f'127.0.0.1:{port}'
+        self.process = None
+        self.launches = 0
+        # デーモンが異常終了して Chrome が残っても、次回の起動時に片付けられるよう記録する（Linux のみ）
+        self.reaper = ProcessReaper()
+
+    def launch(self, timeout=30):
+        """Chrome を起動し、エンドポイントが応答するまで待つ"""
+        binary = find_chrome_binary()
+        if not binary:
+            raise RuntimeError("Chrome の実行ファイルが見つかりません")
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.process = subprocess.Popen([
+            binary,
+            f'--remote-debugging-port={self.port}',
+            f'--user-data-dir={self.profile_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--no-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-blink-features=AutomationControlled',
+            *BACKGROUND_TAB_ARGUMENTS,
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=self.reaper.enabled)
+        self.reaper.register(self.process.pid)
+        self.launches += 1
+
+        deadline = time.monotonic() + timeout
+        while not endpoint_healthy(self.address):
+            if self.process.poll() is not None or time.monotonic() >= deadline:
+                raise RuntimeError("Chrome のリモートデバッグ エンドポイントに接続できません")
+            time.sleep(0.5)
+        self._write_state()
+        logging.info(f"🚀 Chrome を起動しました（PID {self.process.pid}, {self.address}）")
+
+    def login(self):
+        """接続してログイン状態を確認し、必要ならログインする"""
+        driver = attach_driver(self.address, wait=0)
+        if driver is None:
+            return False
+        try:
+            if is_logged_in(driver, URL):
+                logging.info("✅ 保存済みのセッションでログイン済みです")
+                return True
+            logging.info("🔐 ログインしています...")
+            wait = WebDriverWait(driver, 10)
+            wait.until(EC.presence_of_element_located((By.NAME, 'email'))).send_keys(EMAIL)
+            driver.find_element(By.NAME, 'password').send_keys(PASSWORD)
+            driver.find_element(By.XPATH, '//button[contains(text(), "ログイン")]').click()
+            wait.until(EC.presence_of_all_elements_located((By.XPATH, '//button[contains(text(), "受講する")]')))
+            logging.info("✅ ログイン完了！")
+            return True
+        except Exception as e:
+            logging.error(f"❌ ログイン処理でエラーが発生しました: {e}")
+            return False
+        finally:
+            # chromedriver だけを止める（Chrome はデーモンが管理する）
+            driver.service.stop()
+
+    def healthy(self):
+        return self.process is not None and self.process.poll() is None and endpoint_healthy(self.address)
+
+    def stop(self):
+        """Chrome を終了する（起動し直す場合も状態ファイルは残し、接続先を探せるようにする）"""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def _write_state(self):
+        """接続先を状態ファイルに書き出す（デーモン自身の PID で生存を確認する）"""
+        with open(DAEMON_STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'address': self.address, 'daemon_pid': os.getpid(), 'chrome_pid': self.process.pid,
+                       'started': time.time()}, f)
+
+    def _remove_state(self):
+        try:
+            os.remove(DAEMON_STATE_FILE)
+        except OSError:
+            pass
+
+    def run(self):
+        """起動してログインし、ヘルスチェックを続ける（Ctrl+C で終了）"""
+        try:
+            self.reaper.reap_orphans()
+            self.launch()
+            self.login()
+            logging.info(f"📡 スクリプトから接続するには .env に BROWSER_DAEMON={self.address}（または auto）を設定してください")
+            while True:
+                time.sleep(DAEMON_HEALTH_INTERVAL)
+                if self.healthy():
+                    continue
+                logging.warning("⚠️ Chrome が応答しません。起動し直します")
+                self.stop()
+                try:
+                    self.launch()
+                    self.login()
+                except Exception as e:
+                    logging.error(f"❌ Chrome の再起動に失敗しました: {e}")
+        except KeyboardInterrupt:
+            logging.info("⚠️ ユーザーによって中断されました")
+        finally:
+            self.stop()
+            self._remove_state()
+            self.reaper.close()
+            logging.info(f"✅ Chrome を終了しました（起動回数: {self.launches}回）")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler()]
+    )
+    if not EMAIL or not PASSWORD:
+        logging.error("❌ エラー: .env ファイルにメールアドレスとパスワードが設定されていません")
+        sys.exit(1)
+    BrowserDaemon().run()
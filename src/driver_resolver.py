@@ -0,0 +1,135 @@
+"""
+chromedriver の解決（オフライン対応）
+
+インストールされている Chrome のメジャーバージョンを調べ、
+ローカルのキャッシュにある同じバージョンの chromedriver を使う（ネットワークにアクセスしない）
+- キャッシュ: {CHROMEDRIVER_CACHE_DIR}/{メジャーバージョン}/chromedriver(.exe)
+- キャッシュにない場合は webdriver-manager でダウンロードし（従来どおり）、次回以降のためにキャッシュへコピーする
+  （ネットワークに接続できない環境では CHROMEDRIVER_ALLOW_DOWNLOAD=0 にしてキャッシュだけを使う）
+- CHROMEDRIVER_PATH を指定した場合はそのファイルをそのまま使う
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import logging
+import subprocess
+import threading
+from dotenv import load_dotenv
+
+
+# 各スクリプトの load_dotenv() より先に import されるため、ここで .env を読み込む
+load_dotenv()
+
+CHROMEDRIVER_CACHE_DIR = os.getenv(
+    'CHROMEDRIVER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'contents_engine', 'chromedriver')
+)
+CHROMEDRIVER_ALLOW_DOWNLOAD = os.getenv('CHROMEDRIVER_ALLOW_DOWNLOAD', '1') == '1'
+CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH')
+
+_DRIVER_NAME = 'chromedriver.exe' if sys.platform == 'win32' else 'chromedriver'
+
+# Chrome の実行ファイルの候補
+_CHROME_BINARIES = {
+    'win32': [
+        os.path.join(os.environ.get('PROGRAMFILES', r'C:\Program Files'), r'Google\Chrome\Application\chrome.exe'),
+        os.path.join(os.environ.get('PROGRAMFILES(X86)', r'C:\Program Files (x86)'), r'Google\Chrome\Application\chrome.exe'),
+        os.path.join(os.environ.get('LOCALAPPDATA', ''), r'Google\Chrome\Application\chrome.exe'),
+    ],
+    'darwin': ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'],
+    'linux': ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'],
+}
+
+# 1つのプロセスで何度も解決しないよう結果を保持する
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+
+def find_chrome_binary():
+    """インストールされている Chrome の実行ファイルのパスを返す（見つからない場合は None）"""
+    platform = sys.platform if sys.platform in ['win32', 'darwin'] else 'linux'
+    for binary in _CHROME_BINARIES[platform]:
+        path = binary if os.path.isabs(binary) else shutil.which(binary)
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def detect_chrome_version():
+    """インストールされている Chrome のバージョン文字列を返す（見つからない場合は None）"""
+    commands = []
+    if sys.platform == 'win32':
+        commands.append(['reg', 'query', r'HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon', '/v', 'version'])
+    else:
+        binary = find_chrome_binary()
+        if binary:
+            commands.append([binary, '--version'])
+
+    for command in commands:
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+        except Exception as e:
+            logging.debug(f"Chrome のバージョン取得エラー（{command[0]}）: {e}")
+            continue
+        match = re.search(r'(\d+)\.\d+\.\d+\.\d+', output)
+        if match:
+            return match.group(0)
+    return None
+
+
+def cached_driver_path(major):
+    """キャッシュ内の chromedriver のパス（メジャーバージョンごと）"""
+    return os.path.join(CHROMEDRIVER_CACHE_DIR, str(major), _DRIVER_NAME)
+
+
+def _store_in_cache(path, major):
+    """ダウンロードした chromedriver をキャッシュにコピー"""
+    target = cached_driver_path(major)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(path, target)
+        logging.info(f"📦 chromedriver をキャッシュに保存しました: {target}")
+        return target
+    except Exception as e:
+        logging.warning(f"chromedriver のキャッシュ保存エラー: {e}")
+        return path
+
+
+def resolve_chromedriver():
+    """
+    使用する chromedriver のパスを返す
+
+    キャッシュにない・ダウンロードも許可されていない場合は RuntimeError を送出する。
+    """
+    global _resolved_path
+    with _resolve_lock:
+        if _resolved_path:
+            return _resolved_path
+
+        start = time.monotonic()
+        if CHROMEDRIVER_PATH:
+            _resolved_path = CHROMEDRIVER_PATH
+            logging.info(f"🚗 chromedriver: 指定されたパスを使用 {CHROMEDRIVER_PATH}")
+            return _resolved_path
+
+        version = detect_chrome_version()
+        major = version.split('.')[0] if version else None
+        if major and os.path.exists(cached_driver_path(major)):
+            _resolved_path = cached_driver_path(major)
+            logging.info(f"🚗 chromedriver: キャッシュを使用（Chrome {version}）{time.monotonic() - start:.2f}秒")
+            return _resolved_path
+
+        if not CHROMEDRIVER_ALLOW_DOWNLOAD:
+            where = cached_driver_path(major) if major else os.path.join(CHROMEDRIVER_CACHE_DIR, '{メジャーバージョン}', _DRIVER_NAME)
+            raise RuntimeError(
+                f"Chrome {version or '（バージョン不明）'} 用の chromedriver がキャッシュにありません。"
+                f"{where} に配置するか、CHROMEDRIVER_ALLOW_DOWNLOAD=1 を設定してください"
+            )
+
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+        _resolved_path = _store_in_cache(path, major) if major else path
+        logging.info(f"🚗 chromedriver: ダウンロード・バージョン確認を実行（Chrome {version}）{time.monotonic() - start:.2f}秒")
+        return _resolved_path
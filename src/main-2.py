@@ -22,8 +22,14 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import resolve_chromedriver
+from browser_daemon import BROWSER_DAEMON, attach_driver, already_logged_in
 from selenium.webdriver.chrome.service import Service
+from video_utils import get_video_state
+from selector_utils import (
+    PLAY_BUTTON_SELECTORS, NEXT_BUTTON_SELECTORS, BACK_BUTTON_SELECTORS, try_selectors,
+)
+from selector_stats import selector_stats
 
 # Windowsコンソールでの文字化けを回避
 if sys.platform == 'win32':
@@ -107,6 +113,11 @@ def save_progress(section_index):
 
 def setup_driver():
     """Chromeドライバーをセットアップ"""
+    # ブラウザデーモンが起動していれば接続する（Chrome の起動を省く）
+    if BROWSER_DAEMON:
+        driver = attach_driver(BROWSER_DAEMON)
+        if driver:
+            return driver
     # 既存のChromeDriverとChromeプロセスをクリーンアップ
     try:
         import subprocess
@@ -126,13 +137,15 @@ def setup_driver():
     options.add_argument('--disable-dev-shm-usage')
     options.add_argument('--disable-blink-features=AutomationControlled')  # 自動化検出を回避
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver())
     driver = webdriver.Chrome(service=service, options=options)
     driver.maximize_window()  # ウィンドウを最大化
     return driver
 
 def login(driver, email, password):
     """ログイン処理"""
+    if BROWSER_DAEMON and already_logged_in(driver, URL):
+        return True
     logging.info("🔐 ログインしています...")
     
     # ログインページにアクセス
@@ -194,28 +207,14 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
             logging.info("  🎬 再生ボタンを探してクリック...")
             play_button_clicked = False
             
-            # 複数の再生ボタンパターンを試行
-            play_button_selectors = [
-                '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
-                '//button[@class and contains(@class, "play")]',
-                '//div[contains(@class, "video")]//button',
-                '//div[contains(@class, "player")]//button',
-                '//button[contains(@class, "vjs-big-play-button")]',  # Video.js
-                '//div[@class and contains(@class, "play")]',
-            ]
-            
-            for selector in play_button_selectors:
-                try:
-                    play_button = WebDriverWait(driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    play_button.click()
-                    logging.info("  ✅ 再生ボタンをクリックしました")
-                    play_button_clicked = True
-                    time.sleep(3)  # ビデオ読み込み待機
-                    break
-                except:
-                    continue
+            # 複数の再生ボタンパターンを過去の実績順に試行
+            # （クリックに失敗した候補は空振りとして次の候補を試す）
+            play_button, _ = try_selectors(driver, 'play', PLAY_BUTTON_SELECTORS, timeout=3,
+                                           action=lambda element: element.click())
+            if play_button:
+                logging.info("  ✅ 再生ボタンをクリックしました")
+                play_button_clicked = True
+                time.sleep(3)  # ビデオ読み込み待機
             
             if not play_button_clicked:
                 logging.warning("  ⚠️ 再生ボタンが見つかりません（自動再生の可能性）")
@@ -262,9 +261,11 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
                 
                 while elapsed < max_wait:
                     try:
-                        current_time = video.get_property('currentTime')
-                        duration = video.get_property('duration')
-                        paused = video.get_property('paused')
+                        # 再生状態を1回の通信でまとめて取得
+                        state = get_video_state(driver, video)
+                        current_time = state.current_time
+                        duration = state.duration
+                        paused = state.paused
                         
                         if duration and current_time is not None:
                             # 10秒ごとに進捗表示
@@ -294,7 +295,7 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
                             last_time = current_time
                             
                             # ビデオが終了したかチェック
-                            if current_time >= duration - 1:  # 1秒の余裕を持たせる
+                            if state.is_finished():  # 1秒の余裕を持たせる
                                 logging.info(f"  ✅ ビデオ再生完了: {int(duration)}秒")
                                 if section_index and content_index:
                                     print(f"\n[セクション {section_index} / コンテンツ {content_index}] ビデオ再生完了！")
@@ -353,35 +354,18 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
             except Exception as find_e:
                 logging.debug(f"  ボタン検索エラー: {find_e}")
             
-            # 見つかったテキストを使ってセレクタを作成
+            # 見つかったテキストを使ってセレクタを作成（ページごとに変わるため実績には記録しない）
+            page_selectors = []
             if next_button_text:
-                next_button_selectors = [
+                page_selectors = [
                     f'//button[contains(text(), "{next_button_text}")]',
                     f'//a[contains(text(), "{next_button_text}")]',
-                    '//button[contains(text(), "次へ")]',
-                    '//a[contains(text(), "次へ")]',
-                    '//button[contains(@class, "next")]',
-                    '//a[contains(@class, "next")]',
-                ]
-            else:
-                # テキストが見つからない場合のフォールバック
-                next_button_selectors = [
-                    '//button[contains(text(), "次へ")]',
-                    '//a[contains(text(), "次へ")]',
-                    '//button[contains(@class, "next")]',
-                    '//a[contains(@class, "next")]',
                 ]
             
-            next_button = None
-            for selector in next_button_selectors:
-                try:
-                    next_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    logging.info(f"  ✅ 「次へ」ボタン要素を取得しました")
-                    break
-                except:
-                    continue
+            next_button, _ = try_selectors(driver, 'next', NEXT_BUTTON_SELECTORS, timeout=5,
+                                           page_selectors=page_selectors)
+            if next_button:
+                logging.info(f"  ✅ 「次へ」ボタン要素を取得しました")
             
             if next_button:
                 try:
@@ -485,26 +469,13 @@ def play_section(driver, section_index, total_all_sections, total_active_section
             logging.info("  🔙 メインページに戻ります...")
             try:
                 # 左上の戻るボタンを探してクリック
-                back_button_selectors = [
-                    '//button[@aria-label="戻る" or contains(@class, "back")]',
-                    '//a[contains(@href, "/course/")]',
-                    '//button[contains(text(), "戻る")]',
-                    '//a[contains(text(), "Home")]',
-                ]
-                
                 back_button_found = False
-                for selector in back_button_selectors:
-                    try:
-                        back_button = WebDriverWait(driver, 3).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        back_button.click()
-                        logging.info("  ✅ 戻るボタンをクリックしました")
-                        back_button_found = True
-                        time.sleep(2)
-                        break
-                    except:
-                        continue
+                back_button, _ = try_selectors(driver, 'back', BACK_BUTTON_SELECTORS, timeout=3,
+                                               action=lambda element: element.click())
+                if back_button:
+                    logging.info("  ✅ 戻るボタンをクリックしました")
+                    back_button_found = True
+                    time.sleep(2)
                 
                 if not back_button_found:
                     # 戻るボタンが見つからない場合、ブラウザの戻る機能を使用
@@ -730,6 +701,12 @@ def main():
             else:
                 print("🎉 すべてのセクションの再生が完了しました！")
                 logging.info("🎉 すべてのセクションの再生が完了しました！")
+        # セレクタの空振りで失った時間
+        lost_msg = f"🔎 セレクタの空振りによる損失: {selector_stats.total_lost():.1f}秒"
+        print(lost_msg)
+        logging.info(lost_msg)
+        for line in selector_stats.summary_lines():
+            logging.info(line)
         print(f"📄 ログファイル: {LOG_FILE}")
         print("=" * 60)
         print("\n✅ プログラムを終了します...")
@@ -744,6 +721,7 @@ def main():
         import traceback
         logging.error(traceback.format_exc())
     finally:
+        selector_stats.save()
         if driver:
             try:
                 driver.quit()
@@ -12,7 +12,8 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import resolve_chromedriver
+from browser_daemon import BROWSER_DAEMON, attach_driver, already_logged_in
 from selenium.webdriver.chrome.service import Service
 
 # Windowsコンソール対応
@@ -52,6 +53,11 @@ logging.basicConfig(
 
 def setup_driver():
     """Chromeドライバーをセットアップ"""
+    # ブラウザデーモンが起動していれば接続する（Chrome の起動を省く）
+    if BROWSER_DAEMON:
+        driver = attach_driver(BROWSER_DAEMON)
+        if driver:
+            return driver
     try:
         import subprocess
         if sys.platform == 'win32':
@@ -64,13 +70,15 @@ def setup_driver():
     options = webdriver.ChromeOptions()
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver())
     driver = webdriver.Chrome(service=service, options=options)
     driver.maximize_window()
     return driver
 
 def login(driver, email, password):
     """ログイン処理"""
+    if BROWSER_DAEMON and already_logged_in(driver, URL):
+        return True
     logging.info("ログインしています...")
     driver.get(URL)
     wait = WebDriverWait(driver, 10)
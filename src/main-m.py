@@ -1,7 +1,8 @@
 """
 Contents Engine マスタープログラム - セクション/コンテンツリスト取得版
 
-各セクションを順番に開いて、コンテンツのタイトルを取得し、CSVに保存
+各セクションを開いて、コンテンツのタイトルを取得し、CSVに保存
+- 複数のタブでセクションを同時に開いて取得し、セクション順に並べてCSVに保存
 """
 
 import os
@@ -15,8 +16,10 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import resolve_chromedriver
+from browser_daemon import BROWSER_DAEMON, attach_driver, already_logged_in
 from selenium.webdriver.chrome.service import Service
+from tab_pool import run_tab_pool, BACKGROUND_TAB_ARGUMENTS
 
 # Windowsコンソール対応
 if sys.platform == 'win32':
@@ -48,6 +51,11 @@ URL = 'https://letter.the-3rd-brain.com/members/C3sxfGdWUas4/course/UZr4qDbqxh9I
 LOG_FILE = f'content_list_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
 CSV_FILE = f'content_list_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
 
+# 同時に開くタブ数（.env または環境変数から読み込み）
+SCRAPE_TABS = max(1, int(os.getenv('SCRAPE_TABS', '4')))
+
+SECTION_BUTTON_XPATH = '//button[contains(text(), "受講する")]'
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -56,6 +64,11 @@ logging.basicConfig(
 
 def setup_driver():
     """Chromeドライバーをセットアップ"""
+    # ブラウザデーモンが起動していれば接続する（Chrome の起動を省く）
+    if BROWSER_DAEMON:
+        driver = attach_driver(BROWSER_DAEMON)
+        if driver:
+            return driver
     try:
         import subprocess
         if sys.platform == 'win32':
@@ -69,14 +82,19 @@ def setup_driver():
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
     options.add_argument('--disable-blink-features=AutomationControlled')
+    # 背景タブでもページの読み込みが遅くならないようにする
+    for argument in BACKGROUND_TAB_ARGUMENTS:
+        options.add_argument(argument)
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver())
     driver = webdriver.Chrome(service=service, options=options)
     driver.maximize_window()
     return driver
 
 def login(driver, email, password):
     """ログイン処理"""
+    if BROWSER_DAEMON and already_logged_in(driver, URL):
+        return True
     logging.info("ログインしています...")
     driver.get(URL)
     wait = WebDriverWait(driver, 10)
@@ -98,89 +116,90 @@ def login(driver, email, password):
         logging.error(f"ログインエラー: {e}")
         return False
 
-def get_section_content(driver, section_num, section_button):
-    """セクション内のコンテンツを取得"""
-    contents = []
-    parent_window = driver.current_window_handle
-    
-    try:
-        # セクションをクリック
-        section_button.click()
-        time.sleep(2)
-        
-        # ウィンドウ切り替え
-        if len(driver.window_handles) > 1:
-            driver.switch_to.window(driver.window_handles[-1])
-        
-        time.sleep(1)
-        
-        # コンテンツのタイトルを取得
-        # 複数の要素タイプをチェック
-        selectors = [
-            '//li[contains(@class, "step")]',
-            '//div[contains(@class, "lesson-item")]',
-            '//div[contains(@class, "content")]//h3',
-            '//div[contains(@class, "content")]//h2',
-            '//li',
-        ]
-        
-        found_contents = set()
-        
-        for selector in selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, selector)
-                for elem in elements:
-                    text = elem.text.strip()
-                    # フィルタリング：有効なテキストのみ
-                    if text and len(text) > 2 and len(text) < 200 and text not in found_contents:
-                        # 重複を避ける
-                        found_contents.add(text)
-                        contents.append(text)
-                        
-                        # 最大50個まで取得
-                        if len(contents) >= 50:
-                            break
-            except:
-                continue
-            
-            if len(contents) >= 50:
-                break
-        
-        # メインページに戻る
-        driver.back()
-        time.sleep(1)
-        
-        # ウィンドウ切り替え
-        if len(driver.window_handles) > 1:
-            try:
-                driver.close()
-            except:
-                pass
-        driver.switch_to.window(parent_window)
-        time.sleep(1)
-        
-        # セクション一覧を再取得
-        try:
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_all_elements_located((By.XPATH, '//button[contains(text(), "受講する")]'))
-            )
-        except:
-            pass
-        
-    except Exception as e:
-        logging.error(f"セクション {section_num} コンテンツ取得エラー: {e}")
+# コンテンツのタイトルをページ内で一括取得するスクリプト
+# （セレクタ候補を上から評価し、2文字超200文字未満・重複なしのテキストを最大50個）
+_SCRAPE_CONTENTS_SCRIPT = """
+const selectors = [
+    '//li[contains(@class, "step")]',
+    '//div[contains(@class, "lesson-item")]',
+    '//div[contains(@class, "content")]//h3',
+    '//div[contains(@class, "content")]//h2',
+    '//li',
+];
+const contents = [];
+const found = new Set();
+for (const selector of selectors) {
+    const snapshot = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (let i = 0; i < snapshot.snapshotLength; i++) {
+        const text = (snapshot.snapshotItem(i).innerText || '').trim();
+        if (text && text.length > 2 && text.length < 200 && !found.has(text)) {
+            found.add(text);
+            contents.push(text);
+            if (contents.length >= 50) return contents;
+        }
+    }
+}
+return contents;
+"""
+
+def _poll(check, timeout, interval=0.5):
+    """check() が値を返すまで interval 秒ずつ他のタブに処理を譲りながら待つ（タイムアウト時は None）"""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = check()
+        if result or time.monotonic() >= deadline:
+            return result or None
+        yield interval
+
+def get_section_names(driver):
+    """セクション一覧からセクション名を取得"""
+    names = []
+    for section_num, button in enumerate(driver.find_elements(By.XPATH, SECTION_BUTTON_XPATH), 1):
         try:
-            driver.back()
-            if len(driver.window_handles) > 1:
-                try:
-                    driver.close()
-                except:
-                    pass
-            driver.switch_to.window(parent_window)
+            section_name = button.find_element(By.XPATH, '..').text.strip()
+            if '受講する' in section_name:
+                section_name = section_name.replace('受講する', '').strip()
         except:
-            pass
+            section_name = ''
+        names.append(section_name or f"セクション {section_num}")
+    return names
+
+def get_section_content(driver, section_num):
+    """
+    新しいタブでセクションを開いてコンテンツを取得するジェネレーター（run_tab_pool 用）
+
+    ページの読み込みを待つ間は他のタブに処理を譲るため、複数セクションの読み込みが同時に進む。
+    戻り値: コンテンツのタイトルのリスト
+    """
+    # driver.get() は読み込み完了まで戻らないため、遷移だけ開始して待機は譲る
+    driver.execute_script("window.location.href = arguments[0];", URL)
+    buttons = yield from _poll(lambda: driver.find_elements(By.XPATH, SECTION_BUTTON_XPATH), timeout=15)
+    if not buttons or section_num > len(buttons):
+        raise Exception("セクションのボタンが見つかりません")
+    
+    # セクションをクリック
+    listing_url = driver.current_url
+    before_handles = set(driver.window_handles)
+    buttons[section_num - 1].click()
+    
+    # 新しいウィンドウはクリック直後、他のタブに処理を譲る前に確認する
+    # （譲った後では他のタブが開いたウィンドウと区別できないため、最大2秒はこのタブで待つ）
+    deadline = time.monotonic() + 2
+    while True:
+        new_handles = set(driver.window_handles) - before_handles
+        if new_handles or driver.current_url != listing_url or time.monotonic() >= deadline:
+            break
+        time.sleep(0.1)
+    if new_handles:
+        driver.switch_to.window(new_handles.pop())
+    else:
+        # 同じタブで遷移する場合は URL が変わるまで譲りながら待つ
+        yield from _poll(lambda: driver.current_url != listing_url, timeout=10)
     
-    return contents
+    # 読み込み完了後、コンテンツが見つかるまで待機（見つからなければコンテンツなし）
+    yield from _poll(lambda: driver.execute_script("return document.readyState") == 'complete', timeout=10)
+    contents = yield from _poll(lambda: driver.execute_script(_SCRAPE_CONTENTS_SCRIPT), timeout=5)
+    return contents or []
 
 def main():
     """メイン処理"""
@@ -196,8 +215,8 @@ def main():
             return
         
         # セクション一覧を取得
-        buttons = driver.find_elements(By.XPATH, '//button[contains(text(), "受講する")]')
-        total_sections = len(buttons)
+        section_names = get_section_names(driver)
+        total_sections = len(section_names)
         
         print(f"\n{'='*80}")
         print(f"セクション・コンテンツ一覧取得開始")
@@ -208,51 +227,42 @@ def main():
         # CSVヘッダーを設定
         csv_headers = ['セクション番号', 'セクション名', 'コンテンツ番号', 'コンテンツ名']
         
-        # 各セクションを処理
-        for section_num in range(1, total_sections + 1):
-            try:
-                # セクション一覧を再取得（ボタンが新しくなっている可能性）
-                buttons = driver.find_elements(By.XPATH, '//button[contains(text(), "受講する")]')
-                
-                if section_num > len(buttons):
-                    logging.warning(f"セクション {section_num}: ボタンが見つかりません")
-                    break
-                
-                button = buttons[section_num - 1]
-                
-                # セクション名を取得
-                parent_elem = button.find_element(By.XPATH, '..')
-                section_name = parent_elem.text.strip()
-                if '受講する' in section_name:
-                    section_name = section_name.replace('受講する', '').strip()
-                if not section_name:
-                    section_name = f"セクション {section_num}"
-                
-                print(f"セクション {section_num:2d}: {section_name}")
-                logging.info(f"セクション {section_num:2d}: {section_name}")
-                
-                # コンテンツを取得
-                contents = get_section_content(driver, section_num, button)
-                
-                if contents:
-                    print(f"  → コンテンツ {len(contents)} 個を取得")
-                    logging.info(f"  → コンテンツ {len(contents)} 個を取得")
-                    
-                    for content_num, content_name in enumerate(contents, 1):
-                        all_data.append([section_num, section_name, content_num, content_name])
-                        print(f"    {content_num:2d}. {content_name[:60]}")
-                        logging.info(f"    {content_num:2d}. {content_name[:60]}")
-                else:
-                    print(f"  → コンテンツなし")
-                    logging.info(f"  → コンテンツなし")
-                    all_data.append([section_num, section_name, 0, "(コンテンツなし)"])
-                
-                print()
-                
-            except Exception as e:
-                logging.error(f"セクション {section_num} 処理エラー: {e}")
+        # 複数のタブで各セクションのコンテンツを同時に取得
+        start_time = time.monotonic()
+        tab_count = min(SCRAPE_TABS, max(total_sections, 1))
+        results = run_tab_pool(
+            driver,
+            list(range(1, total_sections + 1)),
+            tab_count,
+            section_steps=lambda d, section_num, position, name: get_section_content(d, section_num),
+        )
+        logging.info(f"{tab_count} タブで {total_sections} セクションを {time.monotonic() - start_time:.1f}秒で取得しました")
+        
+        # セクション順に結果をまとめる
+        for section_num, section_name in enumerate(section_names, 1):
+            contents = results[section_num]
+            print(f"セクション {section_num:2d}: {section_name}")
+            logging.info(f"セクション {section_num:2d}: {section_name}")
+            
+            if contents is False:
+                logging.error(f"セクション {section_num} コンテンツ取得エラー")
                 print(f"セクション {section_num}: エラーが発生しました")
                 continue
+            
+            if contents:
+                print(f"  → コンテンツ {len(contents)} 個を取得")
+                logging.info(f"  → コンテンツ {len(contents)} 個を取得")
+                
+                for content_num, content_name in enumerate(contents, 1):
+                    all_data.append([section_num, section_name, content_num, content_name])
+                    print(f"    {content_num:2d}. {content_name[:60]}")
+                    logging.info(f"    {content_num:2d}. {content_name[:60]}")
+            else:
+                print(f"  → コンテンツなし")
+                logging.info(f"  → コンテンツなし")
+                all_data.append([section_num, section_name, 0, "(コンテンツなし)"])
+            
+            print()
         
         # CSVファイルに保存
         print(f"\n{'='*80}")
@@ -13,14 +13,41 @@ import sys
 import time
 import json
 import logging
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import resolve_chromedriver
+from browser_daemon import BROWSER_DAEMON, attach_driver
 from selenium.webdriver.chrome.service import Service
+from video_utils import (
+    wait_for_video_end, get_video_state, PollScheduler, locate_video,
+    VideoLiveness, VideoLostError, video_events, StallDetector, recover_video,
+    enter_video_frame, stalled_by_worker,
+)
+from selector_utils import (
+    PLAY_BUTTON_SELECTORS, BACK_BUTTON_SELECTORS,
+    resolve_selector, try_selectors, find_next_button, click_element,
+)
+from selector_stats import selector_stats
+from worker_pool import run_worker_pool
+from session_share import export_session, import_session, is_logged_in
+from tab_pool import run_tab_pool, BACKGROUND_TAB_ARGUMENTS
+from async_orchestrator import run_async_sessions
+from work_queue import WorkQueue, EXHAUSTED, default_owner
+from section_scheduler import SectionDurations, plan_lpt, plan_lines
+from resource_governor import ResourceGovernor
+from virtual_display import DisplayPool
+from site_guard import SiteGuard
+from profile_template import clone_profile, clone_dir, remove_clones, StartupMetrics
+from process_reaper import ProcessReaper
+from wait_policy import (
+    WaitPolicy, url_changed, new_window_or_url_changed,
+    media_present, video_ready, video_playing, listing_ready, navigated_away,
+)
 
 # Windowsコンソールでの文字化けを回避
 if sys.platform == 'win32':
@@ -69,6 +96,85 @@ LOG_FILE = f'automation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
 START_SECTION = os.getenv('START_SECTION')
 END_SECTION = os.getenv('END_SECTION')
 
+# ビデオ終了の検出方式（.env または環境変数から読み込み）
+# 'event': ビデオ要素にイベントリスナーを注入して終了まで待機（WebDriver通信を最小化）
+# 'poll' : 1秒ごとに再生状態をポーリング（従来方式）
+VIDEO_WAIT_MODE = os.getenv('VIDEO_WAIT_MODE', 'event').lower()
+if VIDEO_WAIT_MODE not in ['event', 'poll']:
+    VIDEO_WAIT_MODE = 'event'
+
+# ポーリング方式での最大確認間隔（秒）＝ビデオ終了検出の最悪遅延
+# 動画の中盤は最大この間隔まで広げ、終了間際は1秒間隔で確認する
+POLL_MAX_INTERVAL = float(os.getenv('POLL_MAX_INTERVAL', '30'))
+
+# 並行再生するブラウザ数（.env または環境変数から読み込み、1 = 従来通り1つずつ再生）
+WORKERS = max(1, int(os.getenv('WORKERS', '1')))
+
+# 1つのブラウザ内で同時に再生するタブ数（.env または環境変数から読み込み、1 = 使わない）
+# 2以上の場合は WORKERS より優先し、1つの Chrome で複数セクションを同時に再生する
+TABS = max(1, int(os.getenv('TABS', '1')))
+
+# asyncio で同時に動かすブラウザセッション数（.env または環境変数から読み込み、0 = 使わない）
+# 1以上の場合は TABS・WORKERS より優先し、1つのイベントループで全セッションを動かす
+ASYNC_SESSIONS = max(0, int(os.getenv('ASYNC_SESSIONS', '0')))
+# Selenium 呼び出しを同時に実行するスレッド数の上限（待機中のセッションはスレッドを使わない）
+EXECUTOR_THREADS = max(1, int(os.getenv('EXECUTOR_THREADS', '4')))
+
+# 複数プロセス・複数マシンでセクションを分担するためのワークキュー（SQLite ファイル、未設定 = 使わない）
+WORK_QUEUE_DB = os.getenv('WORK_QUEUE_DB')
+
+# ワーカー数の自動調整（.env または環境変数から読み込み、WORKERS > 1 のときのみ有効）
+# 1 の場合は MIN_WORKERS 個から始め、ホストの CPU・メモリ・/dev/shm・ビデオ停止率を見て WORKERS 個まで増減する
+AUTO_SCALE = os.getenv('AUTO_SCALE', '0') == '1'
+MIN_WORKERS = max(1, int(os.getenv('MIN_WORKERS', '1')))
+
+# 保存するブラウザプロファイル名（.env または環境変数から読み込み、未設定 = 毎回新しいプロファイル）
+# 設定すると PROFILES_DIR/<名前> をユーザーデータとして使い回し、セッションが有効ならログインを省略する
+# 同じプロファイルは同時に1つの Chrome でしか開けないため、最初のブラウザだけが使う
+BROWSER_PROFILE = os.getenv('BROWSER_PROFILE')
+PROFILES_DIR = os.getenv('PROFILES_DIR', 'profiles')
+
+# 温めたプロファイルのテンプレート名（.env または環境変数から読み込み、未設定 = 使わない）
+# 一度 BROWSER_PROFILE=<同じ名前> で実行してログイン・再生しておくと、
+# 各ブラウザの起動時に PROFILES_DIR/<名前>.clone-<プロセス番号>-<ワーカー名> へ複製して使う（ログインとコールドキャッシュを省く）
+PROFILE_TEMPLATE = os.getenv('PROFILE_TEMPLATE')
+
+# Xvfb 仮想ディスプレイ（.env または環境変数から読み込み、Linux のみ）
+# 'off': 使わない, 'shared': 全ブラウザで1つを共有, 'per_worker': ブラウザごとに1つ
+VIRTUAL_DISPLAY = os.getenv('VIRTUAL_DISPLAY', 'off').lower()
+DISPLAY_GEOMETRY = os.getenv('DISPLAY_GEOMETRY', '1920x1080x24')
+
+# サイトへのアクセス制限（.env または環境変数から読み込み、全ワーカー合計）
+# ログイン・セクションを開く操作を1分あたり RATE_LIMIT_PER_MINUTE 回（連続 RATE_LIMIT_BURST 回）までに抑え、
+# 読み込みの失敗が BREAKER_FAILURES 回続いたら全ワーカーを BREAKER_COOLDOWN 秒停止する
+# RATE_LIMIT_PER_MINUTE が 0 以下の場合は頻度を制限しない
+RATE_LIMIT_PER_MINUTE = float(os.getenv('RATE_LIMIT_PER_MINUTE', '30'))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '5'))
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', '5'))
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', '60'))
+
+# ページ遷移のタイムアウト（秒）。これを超えて遷移しない場合だけサイトへのアクセス失敗として数える
+NAVIGATION_TIMEOUT = 15
+
+# 複数ワーカーが progress.json を同時に書き換えないようにするロック
+_progress_lock = threading.Lock()
+
+# 最初にログインしたブラウザのセッション状態（ワーカー起動時に注入する）
+_shared_session = None
+
+# 固定sleepの代わりに使う条件待機（実行終了時に短縮時間を集計）
+wait_policy = WaitPolicy()
+
+# セクションのリースを管理するワークキュー（WORK_QUEUE_DB 設定時のみ）
+work_queue = WorkQueue(WORK_QUEUE_DB, course=URL) if WORK_QUEUE_DB else None
+WORKER_ID = default_owner()
+
+# セクションごとの所要時間（並行再生時の割り当て順の見積もりに使う）
+section_durations = SectionDurations(course=URL)
+
+# ワーカー数を増減するガバナー（AUTO_SCALE=1 のときのみ）
+governor = ResourceGovernor(MIN_WORKERS, WORKERS, stall_seconds=lambda: stalled_by_worker) if AUTO_SCALE else None
+
 # ログ設定
 logging.basicConfig(
     level=logging.INFO,
@@ -79,6 +185,23 @@ logging.basicConfig(
     ]
 )
 
+# 全ワーカーで共有するアクセス頻度の制限とサーキットブレーカー
+site_guard = SiteGuard(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, BREAKER_FAILURES, BREAKER_COOLDOWN)
+
+# 起動した chromedriver・Chrome のプロセスグループ（Linux で異常終了後に取り残されたものを片付ける）
+process_reaper = ProcessReaper()
+
+# ブラウザごとの起動時の計測（プロファイル複製・ブラウザ起動・最初のコンテンツ再生まで）
+startup_metrics = StartupMetrics()
+
+# 仮想ディスプレイのプール（VIRTUAL_DISPLAY 設定時のみ、終了時にすべて停止する）
+display_pool = None
+if VIRTUAL_DISPLAY in ['shared', 'per_worker']:
+    if DisplayPool.available():
+        display_pool = DisplayPool(VIRTUAL_DISPLAY, DISPLAY_GEOMETRY)
+    else:
+        logging.warning("⚠️ Xvfb が見つからないため、仮想ディスプレイを使わずに起動します")
+
 def load_progress():
     """進捗状況を読み込む"""
     try:
@@ -92,22 +215,46 @@ def load_progress():
 def save_progress(section_index):
     """進捗状況を保存"""
     try:
-        progress = load_progress()
-        if section_index not in progress['completed_sections']:
-            progress['completed_sections'].append(section_index)
-        progress['last_section'] = section_index
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(progress, f, ensure_ascii=False, indent=2)
+        with _progress_lock:
+            progress = load_progress()
+            if section_index not in progress['completed_sections']:
+                progress['completed_sections'].append(section_index)
+            progress['last_section'] = section_index
+            with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
+                json.dump(progress, f, ensure_ascii=False, indent=2)
         logging.info(f"✅ 進捗を保存しました: セクション {section_index}")
     except Exception as e:
         logging.error(f"進捗保存エラー: {e}")
 
-def setup_driver():
-    """Chromeドライバーをセットアップ"""
-    # 既存のChromeDriverとChromeプロセスをクリーンアップ
+def profile_path(name):
+    """プロファイル名から user-data-dir のパスを作る（アカウント名などをそのまま使えるようにする）"""
+    safe_name = ''.join(c if c.isalnum() or c in '-_.@' else '_' for c in name)
+    return os.path.abspath(os.path.join(PROFILES_DIR, safe_name))
+
+# Windows で既存の Chrome を終了する処理を実行したか（最初の起動前に1回だけ実行する）
+_stale_chrome_killed = False
+
+def setup_driver(profile_dir=None, attach=True, metrics_name='main', kill_existing=True):
+    """
+    Chromeドライバーをセットアップ（profile_dir を指定するとそのユーザーデータを使い回す）
+
+    BROWSER_DAEMON を設定している場合は、起動済みのブラウザに接続する（attach=False なら常に起動する）。
+    起動時間は metrics_name の名前で起動時の計測に記録する。
+    Windows では最初の起動前に1回だけ既存の Chrome を終了する（kill_existing=False のワーカーは実行しない、
+    実行すると先に起動した他のワーカーのブラウザまで終了してしまうため）。
+    """
+    global _stale_chrome_killed
+    # ブラウザデーモンが起動していれば接続する（Chrome の起動とログインを省く）
+    if attach and BROWSER_DAEMON:
+        driver = attach_driver(BROWSER_DAEMON)
+        if driver:
+            return driver
+    
+    # 既存のChromeDriverとChromeプロセスをクリーンアップ（最初の起動前に1回だけ）
     try:
         import subprocess
-        if sys.platform == 'win32':
+        if sys.platform == 'win32' and kill_existing and not _stale_chrome_killed:
+            _stale_chrome_killed = True
             # Windowsの場合、既存のchromedriverとchromeプロセスを終了
             subprocess.run(['taskkill', '/F', '/IM', 'chromedriver.exe'], 
                          capture_output=True, stderr=subprocess.DEVNULL)
@@ -122,17 +269,41 @@ def setup_driver():
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
     options.add_argument('--disable-blink-features=AutomationControlled')  # 自動化検出を回避
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument(f'--user-data-dir={profile_dir}')
+    if TABS > 1:
+        # 背景タブでもビデオが実時間で再生されるようにスロットリングを無効化
+        for argument in BACKGROUND_TAB_ARGUMENTS:
+            options.add_argument(argument)
+    
+    # 仮想ディスプレイ上で起動（ワーカーごと、または共有のディスプレイ）
+    display = None
+    service_env = None
+    if display_pool:
+        # asyncio モードでは Selenium 用の共有スレッドで起動するため、スレッド名ではなくワーカー・セッション名で分ける
+        display = display_pool.acquire(metrics_name)
+        options.add_argument(f'--window-size={display.window_size}')
+        service_env = {**os.environ, 'DISPLAY': display.name}
     
-    service = Service(ChromeDriverManager().install())
+    start = time.monotonic()
+    # Linux では新しいプロセスグループで起動し、異常終了しても次回の起動時に片付けられるよう記録する
+    service = Service(resolve_chromedriver(), env=service_env, **process_reaper.service_kwargs())
+    resolved = time.monotonic()
     driver = webdriver.Chrome(service=service, options=options)
-    driver.maximize_window()  # ウィンドウを最大化
+    process_reaper.register(service.process.pid)
+    logging.info(f"⏱️  ブラウザ起動: {time.monotonic() - start:.1f}秒（うち chromedriver の解決 {resolved - start:.1f}秒）")
+    startup_metrics.record(metrics_name, 'ブラウザ起動', time.monotonic() - start)
+    if display is None:
+        driver.maximize_window()  # ウィンドウを最大化（仮想ディスプレイでは --window-size で全画面にする）
     return driver
 
 def login(driver, email, password):
     """ログイン処理"""
     logging.info("🔐 ログインしています...")
     
-    # ログインページにアクセス
+    # ログインページにアクセス（他のワーカーと合わせたアクセス頻度を制限）
+    site_guard.before_request('ログイン')
     driver.get(URL)
     
     # ログイン画面が表示されるまで待機
@@ -161,10 +332,12 @@ def login(driver, email, password):
             EC.presence_of_all_elements_located((By.XPATH, '//button[contains(text(), "受講する")]'))
         )
         logging.info("✅ ログイン完了！セクション一覧が表示されました\n")
+        site_guard.success()
         
         return True
     except Exception as e:
         logging.error(f"❌ ログイン処理でエラーが発生しました: {e}")
+        site_guard.failure(f"ログイン: {e}")
         return False
 
 def get_all_sections(driver):
@@ -177,8 +350,8 @@ def get_all_sections(driver):
         logging.error(f"❌ セクション取得エラー: {e}")
         return []
 
-def play_content(driver, section_index=None, content_index=None, retry_count=3):
-    """単一のコンテンツを再生（ビデオ終了まで）"""
+def play_content(driver, section_index=None, content_index=None, retry_count=3, worker_name='main'):
+    """単一のコンテンツを再生（ビデオ終了まで、停止時間は worker_name のものとして記録する）"""
     for attempt in range(retry_count):
         try:
             wait = WebDriverWait(driver, 15)
@@ -191,28 +364,17 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
             logging.info("  🎬 再生ボタンを探してクリック...")
             play_button_clicked = False
             
-            # 複数の再生ボタンパターンを試行
-            play_button_selectors = [
-                '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
-                '//button[@class and contains(@class, "play")]',
-                '//div[contains(@class, "video")]//button',
-                '//div[contains(@class, "player")]//button',
-                '//button[contains(@class, "vjs-big-play-button")]',  # Video.js
-                '//div[@class and contains(@class, "play")]',
-            ]
-            
-            for selector in play_button_selectors:
+            # 複数の再生ボタンパターンをページ内で一括評価
+            play_button, matched_selector = resolve_selector(driver, PLAY_BUTTON_SELECTORS, timeout=3, kind='play')
+            if play_button:
                 try:
-                    play_button = WebDriverWait(driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    play_button.click()
-                    logging.info("  ✅ 再生ボタンをクリックしました")
+                    click_element(driver, play_button)
+                    logging.info(f"  ✅ 再生ボタンをクリックしました（セレクタ: {matched_selector}）")
                     play_button_clicked = True
-                    time.sleep(3)  # ビデオ読み込み待機
-                    break
-                except:
-                    continue
+                    # ビデオ読み込み待機（video または iframe が現れるまで）
+                    wait_policy.wait(driver, '再生ボタン後の読み込み', media_present(), baseline=3)
+                except Exception as click_e:
+                    logging.debug(f"  再生ボタンのクリックエラー: {click_e}")
             
             if not play_button_clicked:
                 logging.warning("  ⚠️ 再生ボタンが見つかりません（自動再生の可能性）")
@@ -220,50 +382,72 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
             # 2. ビデオ再生完了まで待機
             logging.info("  ⏳ ビデオ再生中（終了まで待機）...")
             
-            # iframe があるか確認して切り替え
-            try:
-                iframes = driver.find_elements(By.TAG_NAME, 'iframe')
-                if iframes:
-                    logging.info(f"  🔍 iframe を発見しました（{len(iframes)}個）、切り替えます...")
-                    driver.switch_to.frame(iframes[0])
-                    logging.info("  ✅ iframe に切り替えました")
-                    time.sleep(2)
-            except Exception as iframe_e:
-                logging.warning(f"  ⚠️ iframe切り替えエラー: {iframe_e}")
-            
             try:
-                # ビデオ要素を探す（iframe内）
-                video = WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.TAG_NAME, 'video'))
-                )
-                logging.info("  ✅ ビデオ要素が見つかりました")
+                # ビデオ要素を含むフレームを探して切り替え（入れ子の iframe にも対応、URLパターンごとにキャッシュ）
+                video = locate_video(driver, timeout=30)
+                if video is None:
+                    raise Exception("ビデオ要素を含むフレームが見つかりません")
                 
                 # JavaScriptで直接ビデオを再生
                 try:
                     driver.execute_script("arguments[0].play();", video)
                     logging.info("  ✅ JavaScriptでビデオ再生を開始しました")
-                    time.sleep(3)  # 再生開始を待つ
+                    # 再生開始を待つ
+                    wait_policy.wait(driver, 'JavaScript再生開始', video_playing(video), baseline=3)
                 except Exception as play_e:
                     logging.warning(f"  ⚠️ JavaScript再生エラー: {play_e}")
                 
-                # ビデオが再生開始するまで待機
-                time.sleep(2)
+                # ビデオのデータが読み込まれるまで待機（readyState >= 2）
+                wait_policy.wait(driver, 'ビデオ準備完了', video_ready(video), baseline=2)
+                startup_metrics.first_content(driver)
                 
                 # ビデオ終了まで監視
                 max_wait = 3600  # 最大1時間
                 elapsed = 0
-                last_time = 0
-                stall_count = 0
+                last_interval = 1
+                video_finished = False
                 
-                while elapsed < max_wait:
+                # イベント方式：終了イベントまで1回のスクリプト呼び出しでブロック
+                if VIDEO_WAIT_MODE == 'event':
+                    section_info = f"[セクション {section_index}]" if section_index else ""
+                    content_info = f"[コンテンツ {content_index}]" if content_index else ""
                     try:
-                        current_time = video.get_property('currentTime')
-                        duration = video.get_property('duration')
-                        paused = video.get_property('paused')
+                        event_result = wait_for_video_end(driver, video, max_wait, label=f"{section_info} {content_info}")
+                        if event_result:
+                            if section_index and content_index:
+                                print(f"\n[セクション {section_index} / コンテンツ {content_index}] ビデオ再生完了！")
+                            video_finished = True
+                        elif event_result is False:
+                            elapsed = max_wait  # 最大待機時間に到達
+                        # None の場合は再生が止まっているため、以下のポーリングで停止対応する
+                    except Exception as event_e:
+                        logging.warning(f"  ⚠️ イベント方式での待機に失敗しました。ポーリングに切り替えます: {event_e}")
+                
+                # 残り時間に応じてポーリング間隔を調整
+                scheduler = PollScheduler(max_interval=POLL_MAX_INTERVAL)
+                # ビデオ要素の生存確認（連続失敗時は数秒以内に再取得）
+                liveness = VideoLiveness()
+                # 停止の種類を判別して段階的に復旧（再開・シーク・ソース再読み込み・ページ再読み込み）
+                stall = StallDetector(worker=worker_name)
+                last_log_elapsed = 0
+                # 経過時間は実際に経った時間で数える（確認処理自体の時間も含める）
+                last_check = time.monotonic()
+                
+                while not video_finished and elapsed < max_wait:
+                    interval = scheduler.min_interval
+                    try:
+                        # 再生状態を1回の通信でまとめて取得
+                        state = get_video_state(driver, video)
+                        liveness.success()
+                        current_time = state.current_time
+                        duration = state.duration
+                        
+                        interval = scheduler.next_interval(state)
                         
                         if duration and current_time is not None:
-                            # 10秒ごとに進捗表示
-                            if int(elapsed) % 10 == 0 and elapsed > 0:
+                            # 10秒ごとに進捗表示（間隔が長い場合は確認のたびに表示）
+                            if elapsed - last_log_elapsed >= 10:
+                                last_log_elapsed = elapsed
                                 progress = (current_time / duration * 100) if duration > 0 else 0
                                 section_info = f"[セクション {section_index}]" if section_index else ""
                                 content_info = f"[コンテンツ {content_index}]" if content_index else ""
@@ -272,37 +456,45 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
                                 # プロンプトにも表示
                                 if section_index and content_index:
                                     print(f"\r[セクション {section_index} / コンテンツ {content_index}] {int(current_time)}/{int(duration)}秒 ({progress:.1f}%)", end='', flush=True)
-                            
-                            # 停止検出（同じ時間が5秒以上続く場合）
-                            if abs(current_time - last_time) < 0.5:
-                                stall_count += 1
-                                if stall_count > 5 and paused:
-                                    logging.warning("  ⚠️ ビデオが一時停止しています。再生を試みます...")
-                                    try:
-                                        driver.execute_script("arguments[0].play();", video)
-                                        stall_count = 0
-                                    except:
-                                        pass
-                            else:
-                                stall_count = 0
-                            
-                            last_time = current_time
-                            
-                            # ビデオが終了したかチェック
-                            if current_time >= duration - 1:  # 1秒の余裕を持たせる
-                                logging.info(f"  ✅ ビデオ再生完了: {int(duration)}秒")
-                                if section_index and content_index:
-                                    print(f"\n[セクション {section_index} / コンテンツ {content_index}] ビデオ再生完了！")
-                                break
+                        
+                        # 停止検出（再生位置が5秒以上進まない場合、種類に応じて復旧）
+                        # メタデータの読み込み前（長さ不明）に発生したエラーも対象にする
+                        stall_kind, recovery = stall.observe(state, last_interval)
+                        if recovery:
+                            video = recover_video(driver, video, stall_kind, recovery, current_time)
+                        
+                        # ビデオが終了したかチェック
+                        if duration and state.is_finished():  # 1秒の余裕を持たせる
+                            logging.info(f"  ✅ ビデオ再生完了: {int(duration)}秒")
+                            if section_index and content_index:
+                                print(f"\n[セクション {section_index} / コンテンツ {content_index}] ビデオ再生完了！")
+                            break
+                    except VideoLostError:
+                        # 復旧手順でも再生できない場合は、生存確認の失敗として数えずにコンテンツ失敗とする
+                        raise
                     except Exception as e:
                         logging.debug(f"  ビデオ状態チェック中: {e}")
+                        if liveness.failure(e):
+                            # 再取得できない場合は VideoLostError でコンテンツ失敗として扱う
+                            video = liveness.reacquire(driver)
+                            scheduler = PollScheduler(max_interval=POLL_MAX_INTERVAL)
                     
-                    time.sleep(1)
-                    elapsed += 1
+                    time.sleep(interval)
+                    now = time.monotonic()
+                    last_interval = now - last_check
+                    elapsed += last_interval
+                    last_check = now
                 
                 if elapsed >= max_wait:
                     logging.warning(f"  ⚠️ 最大待機時間に達しました")
+                
+                # このコンテンツでの停止時間
+                if stall.total_stalled():
+                    logging.info(f"  ⏸️  停止時間: {stall.summary()}")
+                    video_events['stalled_seconds'] += stall.total_stalled()
                     
+            except VideoLostError:
+                raise
             except Exception as e:
                 logging.warning(f"  ⚠️ ビデオ要素が見つかりません: {e}")
             
@@ -316,73 +508,17 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
             # 3. 「次へ」ボタンをクリック
             logging.info("  📌 「次へ」ボタンをクリック...")
             
-            # まず、ページ内のすべてのボタンとリンクを確認して「次へ」を含むものを探す
-            next_button_text = None
-            next_button_found = False
-            
-            try:
-                all_buttons = driver.find_elements(By.TAG_NAME, 'button')
-                for btn in all_buttons:
-                    try:
-                        btn_text = btn.text.strip()
-                        if btn_text and ('次へ' in btn_text or 'next' in btn_text.lower()):
-                            logging.info(f"  ✅ 「次へ」ボタンを発見: '{btn_text}'")
-                            next_button_text = btn_text
-                            next_button_found = True
-                            break
-                    except:
-                        continue
-                
-                if not next_button_found:
-                    all_links = driver.find_elements(By.TAG_NAME, 'a')
-                    for link in all_links:
-                        try:
-                            link_text = link.text.strip()
-                            if link_text and ('次へ' in link_text or 'next' in link_text.lower()):
-                                logging.info(f"  ✅ 「次へ」リンクを発見: '{link_text}'")
-                                next_button_text = link_text
-                                next_button_found = True
-                                break
-                        except:
-                            continue
-            except Exception as find_e:
-                logging.debug(f"  ボタン検索エラー: {find_e}")
-            
-            # 見つかったテキストを使ってセレクタを作成
-            if next_button_text:
-                next_button_selectors = [
-                    f'//button[contains(text(), "{next_button_text}")]',
-                    f'//a[contains(text(), "{next_button_text}")]',
-                    '//button[contains(text(), "次へ")]',
-                    '//a[contains(text(), "次へ")]',
-                    '//button[contains(@class, "next")]',
-                    '//a[contains(@class, "next")]',
-                ]
-            else:
-                # テキストが見つからない場合のフォールバック
-                next_button_selectors = [
-                    '//button[contains(text(), "次へ")]',
-                    '//a[contains(text(), "次へ")]',
-                    '//button[contains(@class, "next")]',
-                    '//a[contains(@class, "next")]',
-                ]
-            
-            next_button = None
-            for selector in next_button_selectors:
-                try:
-                    next_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    logging.info(f"  ✅ 「次へ」ボタン要素を取得しました")
-                    break
-                except:
-                    continue
+            # テキスト・aria-label・class からページ内で一括検索（1回の通信）
+            next_button, next_button_label = find_next_button(driver, timeout=5)
             
             if next_button:
+                logging.info(f"  ✅ 「次へ」ボタンを発見: '{next_button_label}'")
+                before_url = driver.current_url
                 try:
                     next_button.click()
                     logging.info("  ✅ 「次へ」ボタンをクリックしました")
-                    time.sleep(3)  # ページ遷移待機
+                    # ページ遷移待機
+                    wait_policy.wait(driver, '「次へ」後のページ遷移', navigated_away(next_button, before_url), baseline=3)
                     return True
                 except Exception as click_e:
                     logging.warning(f"  ⚠️ 「次へ」ボタンのクリックエラー: {click_e}")
@@ -390,7 +526,7 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
                     try:
                         driver.execute_script("arguments[0].click();", next_button)
                         logging.info("  ✅ JavaScriptで「次へ」ボタンをクリックしました")
-                        time.sleep(3)
+                        wait_policy.wait(driver, '「次へ」後のページ遷移', navigated_away(next_button, before_url), baseline=3)
                         return True
                     except:
                         pass
@@ -398,6 +534,9 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
             logging.info(f"  ℹ️ 「次へ」ボタンが見つかりません（セクション終了）")
             return False
                 
+        except VideoLostError:
+            # リトライしても同じ要素は戻らないため、セクションの失敗として呼び出し元に伝える
+            raise
         except Exception as e:
             if attempt < retry_count - 1:
                 logging.warning(f"  ⚠️ コンテンツ再生エラー（リトライ {attempt + 1}/{retry_count}）: {e}")
@@ -408,7 +547,19 @@ def play_content(driver, section_index=None, content_index=None, retry_count=3):
     
     return False
 
-def play_section(driver, section_index, total_all_sections, total_active_sections=None, current_position=None):
+def wait_for_section_open(driver, section_index, listing_url, handle_count):
+    """
+    「受講する」後のページ遷移（新しいウィンドウが開くか URL が変わる）を待ち、結果をアクセス制御に伝える
+
+    遅いだけで成功した遷移を失敗と数えないよう、NAVIGATION_TIMEOUT 秒待っても遷移しない場合だけ失敗とする。
+    """
+    if wait_policy.wait(driver, '「受講する」後のページ遷移',
+                        new_window_or_url_changed(listing_url, handle_count), baseline=3, timeout=NAVIGATION_TIMEOUT):
+        site_guard.success()
+    else:
+        site_guard.failure(f"セクション {section_index} のページ遷移がタイムアウト（{NAVIGATION_TIMEOUT}秒）")
+
+def play_section(driver, section_index, total_all_sections, total_active_sections=None, current_position=None, worker_name='main'):
     """セクションをすべてのコンテンツとともに再生"""
     # デバッグ：受け取ったsection_indexを確認
     logging.info(f"🔍 play_section: section_index={section_index}, total_all_sections={total_all_sections}, total_active={total_active_sections}, position={current_position}")
@@ -426,6 +577,7 @@ def play_section(driver, section_index, total_all_sections, total_active_section
     print(f"🎬 {display_text} を再生開始")
     print(f"{'='*60}")
     
+    section_start = time.monotonic()
     try:
         wait = WebDriverWait(driver, 15)
         parent_window = driver.current_window_handle
@@ -441,11 +593,14 @@ def play_section(driver, section_index, total_all_sections, total_active_section
                 logging.info(f"🔍 デバッグ: クリックするボタンのテキスト: '{button_text}'")
             except:
                 pass
+            listing_url = driver.current_url
+            handle_count = len(driver.window_handles)
+            site_guard.before_request('セクションを開く')
             buttons[button_index].click()
             logging.info(f"✅ セクション{section_index}の「受講する」ボタン（インデックス{button_index}）をクリックしました")
             
-            # ページ遷移待機
-            time.sleep(3)
+            # ページ遷移待機（新しいウィンドウが開くか URL が変わるまで）
+            wait_for_section_open(driver, section_index, listing_url, handle_count)
             
             # ウィンドウ切り替え（新規ウィンドウが開く場合）
             if len(driver.window_handles) > 1:
@@ -456,13 +611,20 @@ def play_section(driver, section_index, total_all_sections, total_active_section
             content_index = 1
             max_contents = 50  # 無限ループ防止
             consecutive_failures = 0  # 連続失敗カウント
+            video_lost = False
             
             while content_index <= max_contents:
                 logging.info(f"\n  📝 コンテンツ {content_index} を再生...")
                 print(f"\n[セクション {section_index} / コンテンツ {content_index}] 再生開始...")
                 
-                # コンテンツを再生
-                if play_content(driver, section_index=section_index, content_index=content_index):
+                # コンテンツを再生（ビデオを再取得できなかった場合はセクションを未完了のまま終える）
+                try:
+                    played = play_content(driver, section_index=section_index, content_index=content_index, worker_name=worker_name)
+                except VideoLostError as e:
+                    logging.error(f"❌ セクション {section_index} / コンテンツ {content_index}: {e}（進捗は保存しません）")
+                    video_lost = True
+                    break
+                if played:
                     content_index += 1
                     print(f"\n[セクション {section_index} / コンテンツ {content_index - 1}] 完了！")
                     consecutive_failures = 0  # 成功したのでカウントリセット
@@ -479,33 +641,21 @@ def play_section(driver, section_index, total_all_sections, total_active_section
             # メインページに戻る（戻るボタンをクリック）
             logging.info("  🔙 メインページに戻ります...")
             try:
-                # 左上の戻るボタンを探してクリック
-                back_button_selectors = [
-                    '//button[@aria-label="戻る" or contains(@class, "back")]',
-                    '//a[contains(@href, "/course/")]',
-                    '//button[contains(text(), "戻る")]',
-                    '//a[contains(text(), "Home")]',
-                ]
-                
+                # 左上の戻るボタンを探してクリック（過去の実績順に試行）
                 back_button_found = False
-                for selector in back_button_selectors:
-                    try:
-                        back_button = WebDriverWait(driver, 3).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        back_button.click()
-                        logging.info("  ✅ 戻るボタンをクリックしました")
-                        back_button_found = True
-                        time.sleep(2)
-                        break
-                    except:
-                        continue
+                content_url = driver.current_url
+                back_button, _ = try_selectors(driver, 'back', BACK_BUTTON_SELECTORS, timeout=3,
+                                               action=lambda element: element.click())
+                if back_button:
+                    logging.info("  ✅ 戻るボタンをクリックしました")
+                    back_button_found = True
+                    wait_policy.wait(driver, '戻る操作後のページ遷移', url_changed(content_url), baseline=2)
                 
                 if not back_button_found:
                     # 戻るボタンが見つからない場合、ブラウザの戻る機能を使用
                     driver.back()
                     logging.info("  ✅ ブラウザの戻る機能を使用しました")
-                    time.sleep(2)
+                    wait_policy.wait(driver, '戻る操作後のページ遷移', url_changed(content_url), baseline=2)
                     
             except Exception as e:
                 logging.warning(f"  ⚠️ 戻る操作エラー: {e}")
@@ -526,9 +676,14 @@ def play_section(driver, section_index, total_all_sections, total_active_section
                 logging.info("✅ メインページに戻りました\n")
             except:
                 logging.warning("⚠️ メインページの確認ができませんでした")
+                site_guard.failure("セクション一覧の表示がタイムアウト")
+            
+            if video_lost:
+                return False
             
-            # 進捗を保存
+            # 進捗と所要時間を保存
             save_progress(section_index)
+            section_durations.record(section_index, time.monotonic() - section_start)
             
             print(f"\n[セクション {section_index}] 完了！")
             
@@ -547,8 +702,257 @@ def play_section(driver, section_index, total_all_sections, total_active_section
             pass
         return False
 
+def play_content_steps(driver, section_index, content_index, worker_name='main'):
+    """
+    タブ再生用：単一のコンテンツを再生するジェネレーター（次の確認までの秒数を yield する）
+
+    他のタブと WebDriver を共有するため、イベント方式の待機は使わずポーリングで終了を検出する。
+    戻り値: 「次へ」ボタンで次のコンテンツに進んだか
+    """
+    label = f"[セクション {section_index}] [コンテンツ {content_index}]"
+    
+    # 1. 再生ボタンを検索してクリック
+    play_button, matched_selector = resolve_selector(driver, PLAY_BUTTON_SELECTORS, timeout=3, kind='play')
+    if play_button:
+        try:
+            click_element(driver, play_button)
+            logging.info(f"  ✅ {label} 再生ボタンをクリックしました（セレクタ: {matched_selector}）")
+            wait_policy.wait(driver, '再生ボタン後の読み込み', media_present(), baseline=3)
+        except Exception as click_e:
+            logging.debug(f"  再生ボタンのクリックエラー: {click_e}")
+    
+    # 2. ビデオ再生完了まで監視
+    video = locate_video(driver, timeout=30)
+    if video is None:
+        logging.warning(f"  ⚠️ {label} ビデオ要素が見つかりません")
+    else:
+        try:
+            driver.execute_script("arguments[0].play();", video)
+        except Exception as play_e:
+            logging.warning(f"  ⚠️ {label} JavaScript再生エラー: {play_e}")
+        startup_metrics.first_content(driver)
+        
+        max_wait = 3600  # 最大1時間
+        elapsed = 0
+        last_interval = 1
+        last_log_elapsed = 0
+        scheduler = PollScheduler(max_interval=POLL_MAX_INTERVAL)
+        liveness = VideoLiveness()
+        stall = StallDetector(worker=worker_name)
+        # 他のタブの処理で再開が遅れることがあるため、経過時間は実際に経った時間で数える
+        last_check = time.monotonic()
+        
+        while elapsed < max_wait:
+            interval = scheduler.min_interval
+            try:
+                state = get_video_state(driver, video)
+                liveness.success()
+                interval = scheduler.next_interval(state)
+                
+                if state.duration and elapsed - last_log_elapsed >= 10:
+                    last_log_elapsed = elapsed
+                    logging.info(f"  ⏱️  {label} 再生中: {int(state.current_time)}/{int(state.duration)}秒 ({state.progress:.1f}%)")
+                
+                stall_kind, recovery = stall.observe(state, last_interval)
+                if recovery:
+                    video = recover_video(driver, video, stall_kind, recovery, state.current_time)
+                
+                if state.is_finished():
+                    logging.info(f"  ✅ {label} ビデオ再生完了: {int(state.duration)}秒")
+                    break
+            except VideoLostError:
+                raise
+            except Exception as e:
+                logging.debug(f"  ビデオ状態チェック中: {e}")
+                if liveness.failure(e):
+                    video = liveness.reacquire(driver)
+                    scheduler = PollScheduler(max_interval=POLL_MAX_INTERVAL)
+            
+            # 他のタブに処理を譲り、再開時はビデオのフレームに戻る
+            yield interval
+            enter_video_frame(driver)
+            now = time.monotonic()
+            last_interval = now - last_check
+            elapsed += last_interval
+            last_check = now
+        
+        if elapsed >= max_wait:
+            logging.warning(f"  ⚠️ {label} 最大待機時間に達しました")
+        if stall.total_stalled():
+            logging.info(f"  ⏸️  {label} 停止時間: {stall.summary()}")
+            video_events['stalled_seconds'] += stall.total_stalled()
+    
+    try:
+        driver.switch_to.default_content()
+    except:
+        pass
+    
+    # 3. 「次へ」ボタンをクリック
+    next_button, next_button_label = find_next_button(driver, timeout=5)
+    if not next_button:
+        return False
+    before_url = driver.current_url
+    click_element(driver, next_button)
+    logging.info(f"  ✅ {label} 「次へ」ボタンをクリックしました: '{next_button_label}'")
+    wait_policy.wait(driver, '「次へ」後のページ遷移', navigated_away(next_button, before_url), baseline=3)
+    return True
+
+def play_section_steps(driver, section_index, position, total_active_sections=None, worker_name='main'):
+    """
+    タブ再生用：新しいタブでセクションを開いて全コンテンツを再生するジェネレーター
+
+    戻り値: セクションを最後まで再生できたか
+    """
+    logging.info(f"🎬 セクション {section_index}（範囲内 {position}/{total_active_sections}）をタブで再生開始")
+    section_start = time.monotonic()
+    site_guard.before_request('セクション一覧')
+    driver.get(URL)
+    try:
+        WebDriverWait(driver, 15).until(listing_ready())
+    except Exception:
+        site_guard.failure("セクション一覧の表示がタイムアウト")
+        raise
+    site_guard.success()
+    
+    buttons = driver.find_elements(By.XPATH, '//button[contains(text(), "受講する")]')
+    button_index = section_index - 1
+    if button_index >= len(buttons):
+        logging.error(f"❌ セクション {section_index} のボタンが見つかりません")
+        return False
+    
+    listing_url = driver.current_url
+    handle_count = len(driver.window_handles)
+    before_handles = set(driver.window_handles)
+    site_guard.before_request('セクションを開く')
+    buttons[button_index].click()
+    wait_for_section_open(driver, section_index, listing_url, handle_count)
+    
+    # 新しいウィンドウが開いた場合はそちらに切り替え
+    new_handles = set(driver.window_handles) - before_handles
+    if new_handles:
+        driver.switch_to.window(new_handles.pop())
+    
+    content_index = 1
+    max_contents = 50  # 無限ループ防止
+    while content_index <= max_contents:
+        logging.info(f"  📝 [セクション {section_index}] コンテンツ {content_index} を再生...")
+        try:
+            has_next = yield from play_content_steps(driver, section_index, content_index, worker_name)
+        except VideoLostError as e:
+            logging.error(f"  ❌ [セクション {section_index}] コンテンツ {content_index}: {e}（進捗は保存しません）")
+            return False
+        except Exception as e:
+            logging.error(f"  ❌ [セクション {section_index}] コンテンツ再生エラー: {e}")
+            has_next = False
+        if not has_next:
+            break
+        content_index += 1
+    
+    logging.info(f"✅ セクション {section_index} の全コンテンツが完了しました！（合計: {content_index}個）")
+    save_progress(section_index)
+    section_durations.record(section_index, time.monotonic() - section_start)
+    return True
+
+def schedule_sections(sections, worker_count, worker_label):
+    """長いセクションから順に割り当てる再生順を決め、ワーカーごとの予定終了時刻を表示する"""
+    order, assignments, loads, index_makespan = plan_lpt(sections, section_durations, worker_count)
+    print("\n🧮 割り当て計画（長いセクションから順に、最も早く空くワーカーへ）:")
+    logging.info("🧮 割り当て計画（長いセクションから順に、最も早く空くワーカーへ）:")
+    for line in plan_lines(assignments, loads, index_makespan, section_durations, worker_label=worker_label):
+        print(line)
+        logging.info(line)
+    return order
+
+def run_leased(section_index, run):
+    """
+    ワークキュー使用時はセクションのリースを取得してから run() を実行する
+
+    他のプロセスが担当中・完了済みの場合は実行せずに None を返す。
+    再試行回数を使い切っている場合は実行せずに False（失敗）を返す。
+    """
+    if work_queue is None:
+        return run()
+    lease = work_queue.acquire(WORKER_ID, f"section:{section_index}")
+    if lease is EXHAUSTED:
+        logging.warning(f"⚠️ セクション {section_index} は再試行回数（{work_queue.max_attempts}回）を使い切っています（最初から開始すると再試行できます）")
+        return False
+    if lease is None:
+        return None
+    ok = False
+    try:
+        ok = run()
+        return ok
+    finally:
+        lease.finish(bool(ok))
+
+def leased_steps(section_index, make_steps):
+    """run_leased のジェネレーター版（タブ再生・asyncio オーケストレーター用）"""
+    if work_queue is None:
+        return (yield from make_steps())
+    lease = work_queue.acquire(WORKER_ID, f"section:{section_index}")
+    if lease is EXHAUSTED:
+        logging.warning(f"⚠️ セクション {section_index} は再試行回数（{work_queue.max_attempts}回）を使い切っています（最初から開始すると再試行できます）")
+        return False
+    if lease is None:
+        return None
+    ok = False
+    try:
+        ok = yield from make_steps()
+        return ok
+    finally:
+        lease.finish(bool(ok))
+
+def clone_template_profile(name):
+    """テンプレートのプロファイルを name 用に複製してパスを返す（テンプレート未設定・失敗時は None）"""
+    # テンプレートを温めている実行中（BROWSER_PROFILE が同じ名前）は、使用中のプロファイルを複製しない
+    if not PROFILE_TEMPLATE or PROFILE_TEMPLATE == BROWSER_PROFILE:
+        return None
+    target_dir = clone_dir(profile_path(PROFILE_TEMPLATE), name)
+    try:
+        seconds, _ = clone_profile(profile_path(PROFILE_TEMPLATE), target_dir)
+    except Exception as e:
+        logging.warning(f"⚠️ プロファイルのテンプレートを複製できません（新しいプロファイルで起動します）: {e}")
+        return None
+    startup_metrics.record(name, 'プロファイル複製', seconds)
+    return target_dir
+
+def create_worker_driver(name):
+    """
+    ワーカー用のブラウザを起動してログイン（失敗時は None）
+
+    テンプレートから複製したプロファイルのセッションが有効ならそのまま使う。
+    次に最初のブラウザのセッション状態があれば注入してログインフォームを省略し、
+    拒否された場合は通常のログインにフォールバックする。
+    """
+    started = time.monotonic()
+    profile_dir = clone_template_profile(name)
+    # デーモンのブラウザは1つしかないため、ワーカーは常に自分のブラウザを起動する
+    driver = setup_driver(profile_dir, attach=False, metrics_name=name, kill_existing=False)
+    startup_metrics.track(driver, name, started)
+    if profile_dir:
+        site_guard.before_request('ログイン')
+        try:
+            if is_logged_in(driver, URL):
+                site_guard.success()
+                logging.info(f"✅ {name}: 複製したプロファイルのセッションが有効です。ログインを省略します")
+                return driver
+        except Exception as e:
+            logging.debug(f"複製したプロファイルのセッション確認エラー: {e}")
+    if _shared_session:
+        site_guard.before_request('セッション共有')
+    if _shared_session and import_session(driver, _shared_session, URL):
+        return driver
+    if login(driver, EMAIL, PASSWORD):
+        return driver
+    try:
+        driver.quit()
+    except:
+        pass
+    return None
+
 def main():
     """メイン処理"""
+    global _shared_session
     logging.info("=" * 60)
     logging.info("🚀 Contents Engine マスタープログラム 自動化ツール v2.0")
     logging.info("=" * 60)
@@ -566,6 +970,11 @@ def main():
     # 進捗の読み込み
     progress = load_progress()
     completed = progress.get('completed_sections', [])
+    if work_queue:
+        # 他のプロセス・マシンで完了したセクションも完了済みとして扱う
+        done = [int(unit.split(':')[1]) for unit in work_queue.done_units() if unit.startswith('section:')]
+        completed = sorted(set(completed) | set(done))
+        logging.info(f"🗃️  ワークキューを使用します: {WORK_QUEUE_DB}（担当者: {WORKER_ID}）")
     
     if completed:
         logging.info(f"📋 前回の進捗が見つかりました")
@@ -576,15 +985,40 @@ def main():
             completed = []
             if os.path.exists(PROGRESS_FILE):
                 os.remove(PROGRESS_FILE)
+            if work_queue:
+                work_queue.reset()
+    
+    # 前回までの実行が異常終了して残した Chrome・chromedriver を停止（Linux のみ、このツールが起動したものだけ）
+    process_reaper.reap_orphans()
+    if PROFILE_TEMPLATE:
+        # 終了したプロセスが残したプロファイルの複製を削除（実行中の他のプロセスの複製は残す）
+        remove_clones(profile_path(PROFILE_TEMPLATE))
     
     driver = None
     try:
-        # ドライバーセットアップ
-        driver = setup_driver()
+        # ドライバーセットアップ（プロファイル指定時は前回のユーザーデータ、テンプレート指定時はその複製を使う）
+        started = time.monotonic()
+        if BROWSER_PROFILE:
+            profile_dir = profile_path(BROWSER_PROFILE)
+        else:
+            profile_dir = clone_template_profile('main')
+        driver = setup_driver(profile_dir)
+        startup_metrics.track(driver, 'main', started)
         logging.info("✅ ブラウザを起動しました\n")
         
-        # ログイン
-        if not login(driver, EMAIL, PASSWORD):
+        # 保存済みのセッション（またはデーモンのブラウザ）が有効ならログインを省略
+        session_valid = False
+        if profile_dir or BROWSER_DAEMON:
+            site_guard.before_request('ログイン')
+            try:
+                session_valid = is_logged_in(driver, URL)
+            except Exception as e:
+                logging.debug(f"保存済みセッションの確認エラー: {e}")
+        if session_valid:
+            site_guard.success()
+            source = BROWSER_PROFILE or (f"{PROFILE_TEMPLATE} の複製" if PROFILE_TEMPLATE else 'ブラウザデーモン')
+            logging.info(f"✅ 保存済みのセッションが有効です（プロファイル: {source}）。ログインを省略します\n")
+        elif not login(driver, EMAIL, PASSWORD):
             logging.error("❌ ログインに失敗しました")
             return
         
@@ -654,50 +1088,145 @@ def main():
         # 各セクションを再生
         success_count = 0
         failed_sections = []
+        taken_sections = []  # 他のプロセスが担当したセクション（ワークキュー使用時）
         
         # 範囲内のセクションリストを作成（スキップ済みを除く）
         active_sections = [i for i in section_range if i not in completed]
         total_active = len(active_sections)
         current_index = 0
         
-        for i in section_range:
-            # 完了済みセクションはスキップ
-            if i in completed:
-                logging.info(f"⏭️  セクション {i} はスキップします（完了済み）")
-                print(f"\n⏭️  セクション {i} はスキップします（完了済み）")
-                continue
+        if ASYNC_SESSIONS and total_active > 1:
+            # asyncio オーケストレーターで複数セッションを並行再生
+            session_count = min(ASYNC_SESSIONS, total_active)
+            logging.info(f"⚡ {session_count} 個のセッションを asyncio で並行再生します（Selenium スレッド上限: {EXECUTOR_THREADS}）")
+            print(f"\n⚡ {session_count} 個のセッションを asyncio で並行再生します")
+            for i in section_range:
+                if i in completed:
+                    logging.info(f"⏭️  セクション {i} はスキップします（完了済み）")
             
-            # 現在のセクションが範囲内の何番目かを計算
-            current_index += 1
+            # ログイン済みのセッションを書き出して他のセッションと共有
+            _shared_session = export_session(driver)
             
-            try:
-                # 実際のセクション番号（i）を渡す（表示用の位置も渡す）
-                if play_section(driver, i, len(sections), total_active, current_index):
+            first_driver, driver = driver, None  # 1つ目のセッションが終了時に閉じる
+            results = run_async_sessions(
+                schedule_sections(active_sections, session_count, 'session'),
+                session_count,
+                create_driver=create_worker_driver,
+                section_steps=lambda d, i, position, name: leased_steps(
+                    i, lambda: play_section_steps(d, i, position, total_active, worker_name=name)),
+                first_driver=first_driver,
+                executor_threads=EXECUTOR_THREADS,
+            )
+            
+            for i in active_sections:
+                if results[i] is None:
+                    taken_sections.append(i)
+                elif results[i]:
+                    success_count += 1
+                else:
+                    failed_sections.append(i)
+        elif TABS > 1 and total_active > 1:
+            # 1つのブラウザの複数タブで並行再生
+            tab_count = min(TABS, total_active)
+            logging.info(f"🗂️  {tab_count} 個のタブでセクションを並行再生します")
+            print(f"\n🗂️  {tab_count} 個のタブでセクションを並行再生します")
+            for i in section_range:
+                if i in completed:
+                    logging.info(f"⏭️  セクション {i} はスキップします（完了済み）")
+            
+            results = run_tab_pool(
+                driver,
+                schedule_sections(active_sections, tab_count, 'tab'),
+                tab_count,
+                section_steps=lambda d, i, position, name: leased_steps(
+                    i, lambda: play_section_steps(d, i, position, total_active, worker_name=name)),
+            )
+            
+            for i in active_sections:
+                if results[i] is None:
+                    taken_sections.append(i)
+                elif results[i]:
                     success_count += 1
-                    print(f"\n✅ セクション {i} の再生が正常に完了しました")
                 else:
                     failed_sections.append(i)
-                    logging.warning(f"⚠️ セクション {i} の再生に問題がありました")
-                    print(f"\n⚠️ セクション {i} の再生に問題がありました")
+        elif WORKERS > 1 and total_active > 1:
+            # 複数ブラウザで並行再生（共有キューからセクションを取り出す）
+            worker_count = min(WORKERS, total_active)
+            if governor:
+                logging.info(f"👥 {governor.min_workers}-{worker_count} 個のブラウザでセクションを並行再生します（ワーカー数を自動調整）")
+                print(f"\n👥 {governor.min_workers}-{worker_count} 個のブラウザでセクションを並行再生します（ワーカー数を自動調整）")
+            else:
+                logging.info(f"👥 {worker_count} 個のブラウザでセクションを並行再生します")
+                print(f"\n👥 {worker_count} 個のブラウザでセクションを並行再生します")
+            for i in section_range:
+                if i in completed:
+                    logging.info(f"⏭️  セクション {i} はスキップします（完了済み）")
+            
+            # ログイン済みのセッションを書き出して他のワーカーと共有
+            _shared_session = export_session(driver)
+            
+            results = run_worker_pool(
+                schedule_sections(active_sections, worker_count, 'worker'),
+                worker_count,
+                create_driver=create_worker_driver,
+                run_section=lambda d, i, position, name: run_leased(
+                    i, lambda: play_section(d, i, len(sections), total_active, position, worker_name=name)),
+                first_driver=driver,
+                log_prefix=LOG_FILE[:-len('.log')],
+                governor=governor,
+            )
+            driver = None  # 1つ目のワーカーが終了時に閉じる
+            
+            for i in active_sections:
+                if results[i] is None:
+                    taken_sections.append(i)
+                elif results[i]:
+                    success_count += 1
+                else:
+                    failed_sections.append(i)
+        else:
+            for i in section_range:
+                # 完了済みセクションはスキップ
+                if i in completed:
+                    logging.info(f"⏭️  セクション {i} はスキップします（完了済み）")
+                    print(f"\n⏭️  セクション {i} はスキップします（完了済み）")
+                    continue
                 
-                # 指定範囲の最後のセクションが完了した場合、ループを終了
-                if end_section and i == end_section:
-                    logging.info(f"✅ 指定された範囲（セクション {start_section or 1}-{end_section}）の再生が完了しました")
-                    print(f"\n✅ 指定された範囲（セクション {start_section or 1}-{end_section}）の再生が完了しました")
-                    break  # ここで確実にループを抜ける
+                # 現在のセクションが範囲内の何番目かを計算
+                current_index += 1
                 
-                # 次のセクションへ移動する前に少し待機
-                time.sleep(3)
+                try:
+                    # 実際のセクション番号（i）を渡す（表示用の位置も渡す）
+                    result = run_leased(i, lambda: play_section(driver, i, len(sections), total_active, current_index))
+                    if result is None:
+                        taken_sections.append(i)
+                        logging.info(f"⏭️  セクション {i} は他のプロセスが担当しているためスキップします")
+                    elif result:
+                        success_count += 1
+                        print(f"\n✅ セクション {i} の再生が正常に完了しました")
+                    else:
+                        failed_sections.append(i)
+                        logging.warning(f"⚠️ セクション {i} の再生に問題がありました")
+                        print(f"\n⚠️ セクション {i} の再生に問題がありました")
                     
-            except Exception as e:
-                logging.error(f"❌ セクション {i} でエラー: {e}")
-                print(f"\n❌ セクション {i} でエラー: {e}")
-                failed_sections.append(i)
-                
-                # エラーが発生しても、指定範囲の最後のセクションなら終了
-                if end_section and i == end_section:
-                    break
-        
+                    # 指定範囲の最後のセクションが完了した場合、ループを終了
+                    if end_section and i == end_section:
+                        logging.info(f"✅ 指定された範囲（セクション {start_section or 1}-{end_section}）の再生が完了しました")
+                        print(f"\n✅ 指定された範囲（セクション {start_section or 1}-{end_section}）の再生が完了しました")
+                        break  # ここで確実にループを抜ける
+                    
+                    # 次のセクションへ移動する前にセクション一覧の表示を待機
+                    wait_policy.wait(driver, 'セクション間の待機', listing_ready(), baseline=3)
+                        
+                except Exception as e:
+                    logging.error(f"❌ セクション {i} でエラー: {e}")
+                    print(f"\n❌ セクション {i} でエラー: {e}")
+                    failed_sections.append(i)
+                    
+                    # エラーが発生しても、指定範囲の最後のセクションなら終了
+                    if end_section and i == end_section:
+                        break
+            
         # 結果サマリー
         print("\n" + "=" * 60)
         print("📊 実行結果サマリー")
@@ -721,6 +1250,9 @@ def main():
         print(f"⏭️  スキップ: {len(completed)} セクション")
         logging.info(f"✅ 成功: {success_count} セクション")
         logging.info(f"⏭️  スキップ: {len(completed)} セクション")
+        if taken_sections:
+            print(f"🗃️  他のプロセスが担当: {len(taken_sections)} セクション - {taken_sections}")
+            logging.info(f"🗃️  他のプロセスが担当: {len(taken_sections)} セクション - {taken_sections}")
         if failed_sections:
             print(f"⚠️ 失敗: {len(failed_sections)} セクション - {failed_sections}")
             logging.warning(f"⚠️ 失敗: {len(failed_sections)} セクション - {failed_sections}")
@@ -731,6 +1263,53 @@ def main():
             else:
                 print("🎉 すべてのセクションの再生が完了しました！")
                 logging.info("🎉 すべてのセクションの再生が完了しました！")
+        # 条件待機による短縮時間
+        if wait_policy.total_count():
+            saved_msg = f"⏱️  条件待機による短縮時間: {wait_policy.total_saved():.1f}秒（{wait_policy.total_count()}回の待機）"
+            print(saved_msg)
+            logging.info(saved_msg)
+            for line in wait_policy.summary_lines():
+                logging.info(line)
+        # ビデオ要素の喪失・再取得
+        if video_events['stale']:
+            events_msg = (f"🔁 ビデオ要素の喪失: {video_events['stale']}回"
+                          f"（再取得 {video_events['reacquired']}回, 失敗 {video_events['lost']}回）")
+            print(events_msg)
+            logging.info(events_msg)
+        if video_events['stalled_seconds']:
+            stalled_msg = f"⏸️  ビデオ停止時間の合計: {video_events['stalled_seconds']:.0f}秒"
+            print(stalled_msg)
+            logging.info(stalled_msg)
+        # 起動時の計測（プロファイル複製・ブラウザ起動・最初のコンテンツ再生まで）
+        startup_lines = startup_metrics.summary_lines()
+        if startup_lines:
+            print("🚀 起動時の計測:")
+            logging.info("🚀 起動時の計測:")
+            for line in startup_lines:
+                print(line)
+                logging.info(line)
+        # ワーカー数の自動調整の履歴
+        if governor and governor.decisions:
+            governor_msg = f"📈 ワーカー数の自動調整: {len(governor.decisions)}回"
+            print(governor_msg)
+            logging.info(governor_msg)
+            for line in governor.summary_lines():
+                print(line)
+                logging.info(line)
+        # アクセス制限で待った時間・サーキットブレーカーの作動
+        guard_lines = site_guard.summary_lines()
+        if guard_lines:
+            print("🚦 サイトへのアクセス制限:")
+            logging.info("🚦 サイトへのアクセス制限:")
+            for line in guard_lines:
+                print(line)
+                logging.info(line)
+        # セレクタの空振りで失った時間
+        lost_msg = f"🔎 セレクタの空振りによる損失: {selector_stats.total_lost():.1f}秒"
+        print(lost_msg)
+        logging.info(lost_msg)
+        for line in selector_stats.summary_lines():
+            logging.info(line)
         print(f"📄 ログファイル: {LOG_FILE}")
         print("=" * 60)
         print("\n✅ プログラムを終了します...")
@@ -745,12 +1324,20 @@ def main():
         import traceback
         logging.error(traceback.format_exc())
     finally:
+        selector_stats.save()
         if driver:
             try:
                 driver.quit()
                 logging.info("\n✅ ブラウザを閉じました")
             except:
                 pass
+        # ブラウザを閉じてから仮想ディスプレイを停止する（先に止めると Chrome がディスプレイを失って異常終了する）
+        if display_pool:
+            display_pool.close()
+        # 閉じきれずに残った Chrome・chromedriver を停止
+        process_reaper.close()
+        if PROFILE_TEMPLATE:
+            remove_clones(profile_path(PROFILE_TEMPLATE), own=True)
 
 if __name__ == '__main__':
     main()
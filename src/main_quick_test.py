@@ -19,8 +19,15 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import resolve_chromedriver
+from browser_daemon import BROWSER_DAEMON, attach_driver, already_logged_in
 from selenium.webdriver.chrome.service import Service
+from video_utils import get_video_state
+from selector_utils import (
+    PLAY_BUTTON_SELECTORS, NEXT_BUTTON_SELECTORS,
+    resolve_selector, try_selectors, click_element,
+)
+from selector_stats import selector_stats
 
 # Windowsコンソールでの文字化けを回避
 if sys.platform == 'win32':
@@ -75,6 +82,11 @@ logging.basicConfig(
 
 def setup_driver():
     """Chromeドライバーをセットアップ"""
+    # ブラウザデーモンが起動していれば接続する（Chrome の起動を省く）
+    if BROWSER_DAEMON:
+        driver = attach_driver(BROWSER_DAEMON)
+        if driver:
+            return driver
     try:
         import subprocess
         if sys.platform == 'win32':
@@ -91,13 +103,15 @@ def setup_driver():
     options.add_argument('--disable-dev-shm-usage')
     options.add_argument('--disable-blink-features=AutomationControlled')
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver())
     driver = webdriver.Chrome(service=service, options=options)
     driver.maximize_window()
     return driver
 
 def login(driver, email, password):
     """ログイン処理"""
+    if BROWSER_DAEMON and already_logged_in(driver, URL):
+        return True
     logging.info("🔐 ログインしています...")
     
     driver.get(URL)
@@ -158,26 +172,9 @@ def get_content_list(driver, start_section, end_section):
             content_index = 1
             
             while True:
-                # 再生ボタンがあるか確認（複数のセレクタを試行）
-                play_button_found = False
-                play_button_selectors = [
-                    '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
-                    '//button[@class and contains(@class, "play")]',
-                    '//div[contains(@class, "video")]//button',
-                    '//div[contains(@class, "player")]//button',
-                    '//button[contains(@class, "vjs-big-play-button")]',
-                    '//div[@class and contains(@class, "play")]',
-                ]
-                
-                for selector in play_button_selectors:
-                    try:
-                        WebDriverWait(driver, 3).until(
-                            EC.presence_of_element_located((By.XPATH, selector))
-                        )
-                        play_button_found = True
-                        break
-                    except:
-                        continue
+                # 再生ボタンがあるか確認（全候補をページ内で一括評価）
+                play_button, _ = resolve_selector(driver, PLAY_BUTTON_SELECTORS, timeout=3, clickable=False, kind='play')
+                play_button_found = play_button is not None
                 
                 if play_button_found:
                     content_count += 1
@@ -186,24 +183,12 @@ def get_content_list(driver, start_section, end_section):
                     
                     # 「次へ」ボタンをクリック
                     next_button_clicked = False
-                    next_button_selectors = [
-                        '//button[contains(text(), "次へ")]',
-                        '//a[contains(text(), "次へ")]',
-                        '//button[contains(@class, "next")]',
-                        '//a[contains(@class, "next")]',
-                    ]
-                    
-                    for selector in next_button_selectors:
-                        try:
-                            next_button = WebDriverWait(driver, 3).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                            next_button.click()
-                            next_button_clicked = True
-                            time.sleep(2)
-                            break
-                        except:
-                            continue
+                    # （クリックに失敗した候補は空振りとして次の候補を試す）
+                    next_button, _ = try_selectors(driver, 'next', NEXT_BUTTON_SELECTORS, timeout=3,
+                                                   action=lambda element: element.click())
+                    if next_button:
+                        next_button_clicked = True
+                        time.sleep(2)
                     
                     if not next_button_clicked:
                         logging.info(f"    セクション {section_num} は {content_count} 個のコンテンツで終了")
@@ -248,26 +233,15 @@ def play_content_quick(driver, section_index, content_index, test_duration=10, r
             logging.info(f"  🎬 再生ボタンを探してクリック...")
             play_button_clicked = False
             
-            play_button_selectors = [
-                '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
-                '//button[@class and contains(@class, "play")]',
-                '//div[contains(@class, "video")]//button',
-                '//div[contains(@class, "player")]//button',
-                '//button[contains(@class, "vjs-big-play-button")]',
-            ]
-            
-            for selector in play_button_selectors:
+            play_button, matched_selector = resolve_selector(driver, PLAY_BUTTON_SELECTORS, timeout=3, kind='play')
+            if play_button:
                 try:
-                    play_button = WebDriverWait(driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    play_button.click()
-                    logging.info("  ✅ 再生ボタンをクリックしました")
+                    click_element(driver, play_button)
+                    logging.info(f"  ✅ 再生ボタンをクリックしました（セレクタ: {matched_selector}）")
                     play_button_clicked = True
                     time.sleep(3)
-                    break
-                except:
-                    continue
+                except Exception as click_e:
+                    logging.debug(f"  再生ボタンのクリックエラー: {click_e}")
             
             if not play_button_clicked:
                 logging.warning("  ⚠️ 再生ボタンが見つかりません")
@@ -301,8 +275,10 @@ def play_content_quick(driver, section_index, content_index, test_duration=10, r
                 start_time = time.time()
                 while elapsed < test_duration:
                     try:
-                        current_time = video.get_property('currentTime')
-                        duration = video.get_property('duration')
+                        # 再生状態を1回の通信でまとめて取得
+                        state = get_video_state(driver, video)
+                        current_time = state.current_time
+                        duration = state.duration
                         
                         if duration and current_time is not None:
                             progress = (current_time / duration * 100) if duration > 0 else 0
@@ -328,21 +304,7 @@ def play_content_quick(driver, section_index, content_index, test_duration=10, r
             # 「次へ」ボタンをクリック
             logging.info("  📌 「次へ」ボタンをクリック...")
             
-            next_button_selectors = [
-                '//button[contains(text(), "次へ")]',
-                '//a[contains(text(), "次へ")]',
-                '//button[contains(@class, "next")]',
-            ]
-            
-            next_button = None
-            for selector in next_button_selectors:
-                try:
-                    next_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    break
-                except:
-                    continue
+            next_button, _ = try_selectors(driver, 'next', NEXT_BUTTON_SELECTORS, timeout=5)
             
             if next_button:
                 try:
@@ -543,6 +505,7 @@ def main():
         import traceback
         logging.error(traceback.format_exc())
     finally:
+        selector_stats.save()
         if driver:
             try:
                 driver.quit()
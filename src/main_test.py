@@ -17,8 +17,15 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import resolve_chromedriver
+from browser_daemon import BROWSER_DAEMON, attach_driver, already_logged_in
 from selenium.webdriver.chrome.service import Service
+from video_utils import get_video_state
+from selector_utils import (
+    PLAY_BUTTON_SELECTORS, NEXT_BUTTON_SELECTORS, BACK_BUTTON_SELECTORS,
+    resolve_selector, try_selectors, click_element,
+)
+from selector_stats import selector_stats
 
 # .env ファイルから環境変数を読み込む
 load_dotenv()
@@ -46,19 +53,26 @@ logging.basicConfig(
 
 def setup_driver():
     """Chromeドライバーをセットアップ"""
+    # ブラウザデーモンが起動していれば接続する（Chrome の起動を省く）
+    if BROWSER_DAEMON:
+        driver = attach_driver(BROWSER_DAEMON)
+        if driver:
+            return driver
     options = webdriver.ChromeOptions()
     # options.add_argument('--headless')  # テスト時は画面を見たいのでコメントアウト
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
     options.add_argument('--disable-blink-features=AutomationControlled')
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver())
     driver = webdriver.Chrome(service=service, options=options)
     driver.maximize_window()
     return driver
 
 def login(driver, email, password):
     """ログイン処理"""
+    if BROWSER_DAEMON and already_logged_in(driver, URL):
+        return True
     logging.info("🔐 ログインしています...")
     
     driver.get(URL)
@@ -100,27 +114,16 @@ def play_content_test(driver, content_index):
         logging.info("  📍 再生ボタンを探してクリック...")
         play_button_clicked = False
         
-        play_button_selectors = [
-            '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
-            '//button[@class and contains(@class, "play")]',
-            '//div[contains(@class, "video")]//button',
-            '//div[contains(@class, "player")]//button',
-            '//button[contains(@class, "vjs-big-play-button")]',
-            '//div[@class and contains(@class, "play")]',
-        ]
-        
-        for selector in play_button_selectors:
+        # 全候補をページ内で一括評価
+        play_button, matched_selector = resolve_selector(driver, PLAY_BUTTON_SELECTORS, timeout=3, kind='play')
+        if play_button:
             try:
-                play_button = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((By.XPATH, selector))
-                )
-                play_button.click()
-                logging.info("  ✅ 再生ボタンをクリックしました")
+                click_element(driver, play_button)
+                logging.info(f"  ✅ 再生ボタンをクリックしました（セレクタ: {matched_selector}）")
                 play_button_clicked = True
                 time.sleep(3)
-                break
-            except:
-                continue
+            except Exception as click_e:
+                logging.debug(f"  再生ボタンのクリックエラー: {click_e}")
         
         if not play_button_clicked:
             logging.warning("  ⚠️ 再生ボタンが見つかりません（自動再生の可能性）")
@@ -171,7 +174,7 @@ def play_content_test(driver, content_index):
                 # 再生ボタンを探してクリックする方法も試す
                 try:
                     # iframe内の再生ボタンを探す
-                    play_button_selectors = [
+                    iframe_play_selectors = [
                         '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
                         '//button[@class and contains(@class, "play")]',
                         '//div[contains(@class, "play")]',
@@ -179,18 +182,12 @@ def play_content_test(driver, content_index):
                     ]
                     
                     button_clicked = False
-                    for selector in play_button_selectors:
-                        try:
-                            play_btn = WebDriverWait(driver, 3).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                            play_btn.click()
-                            logging.info(f"  ✅ iframe内の再生ボタンをクリックしました")
-                            button_clicked = True
-                            time.sleep(3)
-                            break
-                        except:
-                            continue
+                    play_btn, matched_selector = resolve_selector(driver, iframe_play_selectors, timeout=3)
+                    if play_btn:
+                        click_element(driver, play_btn)
+                        logging.info(f"  ✅ iframe内の再生ボタンをクリックしました（セレクタ: {matched_selector}）")
+                        button_clicked = True
+                        time.sleep(3)
                     
                     if not button_clicked:
                         logging.warning("  ⚠️ iframe内の再生ボタンが見つかりませんでした")
@@ -206,9 +203,11 @@ def play_content_test(driver, content_index):
             
             while elapsed < max_wait:
                 try:
-                    current_time = video.get_property('currentTime')
-                    duration = video.get_property('duration')
-                    paused = video.get_property('paused')
+                    # 再生状態を1回の通信でまとめて取得
+                    state = get_video_state(driver, video)
+                    current_time = state.current_time
+                    duration = state.duration
+                    paused = state.paused
                     
                     if duration and current_time is not None:
                         # 10秒ごとに進捗表示
@@ -232,7 +231,7 @@ def play_content_test(driver, content_index):
                         last_time = current_time
                         
                         # ビデオが終了したかチェック
-                        if current_time >= duration - 1:  # 1秒の余裕を持たせる
+                        if state.is_finished():  # 1秒の余裕を持たせる
                             logging.info(f"  ✅ ビデオ再生完了: {int(duration)}秒")
                             break
                 except Exception as e:
@@ -315,35 +314,18 @@ def play_content_test(driver, content_index):
         except Exception as debug_e:
             logging.warning(f"  ⚠️ デバッグ情報取得エラー: {debug_e}")
         
-        # 見つかったテキストを使ってセレクタを作成
+        # 見つかったテキストを使ってセレクタを作成（ページごとに変わるため実績には記録しない）
+        page_selectors = []
         if next_button_text:
-            next_button_selectors = [
+            page_selectors = [
                 f'//button[contains(text(), "{next_button_text}")]',
                 f'//a[contains(text(), "{next_button_text}")]',
-                '//button[contains(text(), "次へ")]',
-                '//a[contains(text(), "次へ")]',
-                '//button[contains(@class, "next")]',
-                '//a[contains(@class, "next")]',
-            ]
-        else:
-            # テキストが見つからない場合のフォールバック
-            next_button_selectors = [
-                '//button[contains(text(), "次へ")]',
-                '//a[contains(text(), "次へ")]',
-                '//button[contains(@class, "next")]',
-                '//a[contains(@class, "next")]',
             ]
         
-        next_button = None
-        for selector in next_button_selectors:
-            try:
-                next_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, selector))
-                )
-                logging.info(f"  ✅ 「次へ」ボタン要素を取得しました（セレクタ: {selector}）")
-                break
-            except:
-                continue
+        next_button, selector = try_selectors(driver, 'next', NEXT_BUTTON_SELECTORS, timeout=5,
+                                      page_selectors=page_selectors)
+        if next_button:
+            logging.info(f"  ✅ 「次へ」ボタン要素を取得しました（セレクタ: {selector}）")
         
         if next_button:
             try:
@@ -427,26 +409,13 @@ def test_section(driver):
         # メインページに戻る
         logging.info("  🔙 メインページに戻ります...")
         try:
-            back_button_selectors = [
-                '//button[@aria-label="戻る" or contains(@class, "back")]',
-                '//a[contains(@href, "/course/")]',
-                '//button[contains(text(), "戻る")]',
-                '//a[contains(text(), "Home")]',
-            ]
-            
             back_button_found = False
-            for selector in back_button_selectors:
-                try:
-                    back_button = WebDriverWait(driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    back_button.click()
-                    logging.info("  ✅ 戻るボタンをクリックしました")
-                    back_button_found = True
-                    time.sleep(2)
-                    break
-                except:
-                    continue
+            back_button, _ = try_selectors(driver, 'back', BACK_BUTTON_SELECTORS, timeout=3,
+                                           action=lambda element: element.click())
+            if back_button:
+                logging.info("  ✅ 戻るボタンをクリックしました")
+                back_button_found = True
+                time.sleep(2)
             
             if not back_button_found:
                 driver.back()
@@ -528,6 +497,7 @@ def main():
         import traceback
         logging.error(traceback.format_exc())
     finally:
+        selector_stats.save()
         if driver:
             try:
                 input("\n✋ Enterキーを押すとブラウザを閉じます...")
@@ -0,0 +1,211 @@
+"""
+取り残された Chrome・chromedriver の片付け（Linux）
+
+異常終了した実行が残した chrome・chromedriver のプロセスツリーを停止してメモリを解放する
+- chromedriver を新しいプロセスグループで起動し（Chrome はそのグループに入る）、
+  グループ番号を実行ディレクトリの記録ファイル（プロセスごとに1つ）に書き込む
+- 起動時: 記録したプロセスが既に終了している記録だけを対象に、残っているグループを停止する
+- 終了時: 自分のグループで残っているプロセスを停止して記録を削除する
+- 記録にないブラウザ（手動で開いた Chrome や他のツールのもの）には触れない
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import signal
+import logging
+import threading
+from dotenv import load_dotenv
+
+
+# 各スクリプトの load_dotenv() より先に import されるため、ここで .env を読み込む
+load_dotenv()
+
+# プロセスグループの記録ディレクトリ（実行ディレクトリからの相対パス）
+CHROME_PIDS_DIR = os.getenv('CHROME_PIDS_DIR', 'chrome_pids')
+
+
+def _supported():
+    return sys.platform.startswith('linux') and os.path.isdir('/proc')
+
+
+def _proc_stat(pid):
+    """/proc/<pid>/stat から (プロセスグループ, 起動時刻) を返す（存在しない場合は None）"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return int(fields[2]), int(fields[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _alive(pid):
+    """プロセスが動いているか（終了済みで回収待ちのゾンビは含めない）"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return False
+
+
+def _is_chrome(pid):
+    """chrome・chromium・chromedriver のプロセスか"""
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return b'chrom' in f.read().lower()
+    except OSError:
+        return False
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _group_members(pgid):
+    """プロセスグループ pgid に属する chrome 系のプロセス"""
+    members = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        stat = _proc_stat(int(entry))
+        if stat and stat[0] == pgid and _alive(int(entry)) and _is_chrome(int(entry)):
+            members.append(int(entry))
+    return members
+
+
+def _terminate(pids, timeout=5):
+    """SIGTERM で停止し、timeout 秒以内に終了しなければ SIGKILL で停止する"""
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+    deadline = time.monotonic() + timeout
+    remaining = list(pids)
+    while remaining and time.monotonic() < deadline:
+        time.sleep(0.2)
+        remaining = [pid for pid in remaining if _alive(pid)]
+    for pid in remaining:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _reap_group(group):
+    """
+    記録したグループの残りを停止する（戻り値: (停止したプロセス数, 解放したメモリのバイト数)）
+
+    グループの先頭プロセスが別の起動時刻で生きている場合は、番号が再利用されているため触れない。
+    """
+    pgid = group['pgid']
+    leader = _proc_stat(pgid)
+    if leader and leader[1] != group['started']:
+        return 0, 0
+    members = _group_members(pgid)
+    if not members:
+        return 0, 0
+    freed = sum(_rss_bytes(pid) for pid in members)
+    _terminate(members)
+    return len(members), freed
+
+
+class ProcessReaper:
+    """このプロセスが起動した chromedriver のプロセスグループを記録・片付けする"""
+
+    def __init__(self, state_dir=CHROME_PIDS_DIR):
+        self.state_dir = state_dir
+        self.enabled = _supported()
+        self.groups = []
+        self._lock = threading.Lock()
+        self._closed = False
+        if self.enabled:
+            atexit.register(self.close)
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.state_dir, f'{os.getpid()}.json')
+
+    def service_kwargs(self):
+        """chromedriver の Service に渡す引数（新しいプロセスグループで起動する）"""
+        return {'popen_kw': {'start_new_session': True}} if self.enabled else {}
+
+    def register(self, pid):
+        """起動した chromedriver の PID を記録する（Chrome は同じグループに入る）"""
+        if not self.enabled or not pid:
+            return
+        stat = _proc_stat(pid)
+        if stat is None or stat[0] != pid:
+            return  # 新しいグループで起動されていない（自分のグループを記録しない）
+        with self._lock:
+            self.groups.append({'pgid': pid, 'started': stat[1]})
+            self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(self._state_path, 'w', encoding='utf-8') as f:
+                json.dump({'owner_pid': os.getpid(), 'owner_started': _proc_stat(os.getpid())[1],
+                           'groups': self.groups}, f)
+        except Exception as e:
+            logging.debug(f"プロセスグループの記録エラー: {e}")
+
+    def _report(self, count, freed, when):
+        if count:
+            logging.info(f"🧹 {when}: 取り残された Chrome・chromedriver を {count} 個停止しました"
+                         f"（約 {freed / (1024 * 1024):.0f}MB 解放）")
+
+    def reap_orphans(self):
+        """前回までの実行が残したプロセスを停止する（記録した実行が既に終了しているものだけ）"""
+        if not self.enabled or not os.path.isdir(self.state_dir):
+            return 0, 0
+        count = freed = 0
+        for entry in os.listdir(self.state_dir):
+            path = os.path.join(self.state_dir, entry)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except Exception:
+                continue
+            if state['owner_pid'] == os.getpid():
+                continue
+            owner = _proc_stat(state['owner_pid'])
+            if owner and owner[1] == state['owner_started']:
+                continue  # 実行中の別のプロセスのもの
+            for group in state['groups']:
+                reaped, memory = _reap_group(group)
+                count += reaped
+                freed += memory
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._report(count, freed, "起動時")
+        return count, freed
+
+    def close(self):
+        """自分のグループで残っているプロセスを停止して記録を削除する（ドライバーの終了後に呼ぶ）"""
+        with self._lock:
+            if not self.enabled or self._closed:
+                return 0, 0
+            self._closed = True
+            count = freed = 0
+            for group in self.groups:
+                reaped, memory = _reap_group(group)
+                count += reaped
+                freed += memory
+            try:
+                os.remove(self._state_path)
+            except OSError:
+                pass
+        self._report(count, freed, "終了時")
+        return count, freed
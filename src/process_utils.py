@@ -0,0 +1,58 @@
+"""
+プロセスの補助関数
+
+複数のモジュールが記録した PID の生存確認に使う共通の関数
+- psutil があれば使い、なければ Windows では OpenProcess、それ以外では os.kill(pid, 0) で確認する
+  （Windows の os.kill(pid, 0) は CTRL_C_EVENT の送信になり、生存確認にならない）
+"""
+
+import os
+import sys
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_ERROR_ACCESS_DENIED = 5
+_STILL_ACTIVE = 259
+
+
+def _windows_pid_exists(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # 権限がなくて開けない場合は、プロセス自体は存在する
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        # 終了済みでもハンドルが残っていれば開けるため、終了コードで確認する
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def pid_exists(pid):
+    """PID のプロセスが動いているか（0 以下・未記録の PID は False）"""
+    if not pid or pid <= 0:
+        return False
+    if psutil:
+        return psutil.pid_exists(pid)
+    if sys.platform == 'win32':
+        return _windows_pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 権限がなくてシグナルを送れない場合は、プロセス自体は存在する
+        return True
+    return True
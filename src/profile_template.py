@@ -0,0 +1,139 @@
+"""
+ブラウザプロファイルのテンプレート
+
+ログイン済みで、キャッシュ・Cookie・プレーヤーの資源が揃った（温まった）プロファイルを1つ用意しておき、
+ワーカーの起動時にワーカーごとのディレクトリへ複製する（コールドキャッシュ・初回起動処理・ログインを省く）
+- 可能ならコピーオンライト（cp --reflink）で丸ごと複製し、使えないファイルシステムではコピーする
+  （Chrome はキャッシュも Cookie もその場で書き換えるため、テンプレートや他の複製とファイルを共有しない）
+- 複製先にはプロセス番号を含め、同じホストで同時に動く別の実行の複製を消さない
+- 複製時間と最初のコンテンツ再生までの時間を起動時の計測として記録する
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import subprocess
+import threading
+from process_utils import pid_exists
+
+
+# 複製しないファイル（テンプレートを使った Chrome のロック。複製すると使用中と判定される）
+_SKIP_FILES = {'SingletonLock', 'SingletonSocket', 'SingletonCookie', 'lockfile', 'RunningChromeVersion'}
+
+# 複製先の名前に付ける印（ユーザーが作ったプロファイルと区別する）
+_CLONE_MARK = '.clone-'
+
+
+def _reflink_copy(template_dir, target_dir):
+    """コピーオンライトで丸ごと複製（対応していないファイルシステム・OS では False）"""
+    if not sys.platform.startswith('linux'):
+        return False
+    result = subprocess.run(
+        ['cp', '-a', '--reflink=always', template_dir, target_dir],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    if result.returncode != 0:
+        shutil.rmtree(target_dir, ignore_errors=True)
+        return False
+    for root, _, files in os.walk(target_dir):
+        for name in files:
+            if name in _SKIP_FILES:
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    pass
+    return True
+
+
+def _copy(template_dir, target_dir):
+    """通常のコピーで複製"""
+    shutil.copytree(template_dir, target_dir, symlinks=True,
+                    ignore=lambda _, names: [name for name in names if name in _SKIP_FILES])
+
+
+def clone_dir(template_dir, name):
+    """この実行の name 用の複製先（<テンプレート>.clone-<プロセス番号>-<name>）"""
+    return f'{template_dir}{_CLONE_MARK}{os.getpid()}-{name}'
+
+
+def remove_clones(template_dir, own=False):
+    """
+    複製を削除する
+
+    own=False: 終了したプロセスが残した複製（起動時に呼ぶ）
+    own=True: この実行の複製（終了時に呼ぶ）
+    """
+    parent = os.path.dirname(template_dir) or '.'
+    prefix = os.path.basename(template_dir) + _CLONE_MARK
+    if not os.path.isdir(parent):
+        return
+    for entry in os.listdir(parent):
+        if not entry.startswith(prefix):
+            continue
+        pid = entry[len(prefix):].split('-', 1)[0]
+        if not pid.isdigit():
+            continue
+        if (int(pid) == os.getpid()) if own else not pid_exists(int(pid)):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def clone_profile(template_dir, target_dir):
+    """
+    テンプレートのプロファイルを target_dir に複製する
+
+    同じ複製先が残っていれば削除してから複製する（毎回テンプレートと同じ状態から始める）。
+    target_dir は clone_dir() で作り、他の実行と重ならないようにする。
+    戻り値: (複製にかかった秒数, 方式)
+    """
+    if not os.path.isdir(template_dir):
+        raise FileNotFoundError(f"プロファイルのテンプレートが見つかりません: {template_dir}")
+    start = time.monotonic()
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(target_dir) or '.', exist_ok=True)
+    if _reflink_copy(template_dir, target_dir):
+        method = 'reflink'
+    else:
+        _copy(template_dir, target_dir)
+        method = 'copy'
+    seconds = time.monotonic() - start
+    logging.info(f"🧬 プロファイルを複製しました: {os.path.basename(target_dir)}（{method}, {seconds:.2f}秒）")
+    return seconds, method
+
+
+class StartupMetrics:
+    """ブラウザごとの起動時の計測（プロファイル複製・ブラウザ起動・最初のコンテンツ再生まで）"""
+
+    def __init__(self):
+        self.records = {}   # 名前 -> {計測名: 秒}
+        self._starts = {}   # id(driver) -> (名前, 起動処理の開始時刻)
+        self._lock = threading.Lock()
+
+    def record(self, name, key, seconds):
+        with self._lock:
+            self.records.setdefault(name, {})[key] = seconds
+
+    def track(self, driver, name, started):
+        """driver の最初のコンテンツ再生までの時間を、started（time.monotonic()）から計測する"""
+        with self._lock:
+            self._starts[id(driver)] = (name, started)
+
+    def first_content(self, driver):
+        """コンテンツの再生が始まったときに呼ぶ（driver ごとに最初の1回だけ記録する）"""
+        with self._lock:
+            entry = self._starts.pop(id(driver), None)
+        if entry is None:
+            return
+        name, started = entry
+        seconds = time.monotonic() - started
+        self.record(name, '最初のコンテンツ', seconds)
+        logging.info(f"⏱️  {name}: 起動から最初のコンテンツ再生まで {seconds:.1f}秒")
+
+    def summary_lines(self):
+        """ブラウザごとの計測を文字列のリストで返す"""
+        lines = []
+        for name, values in sorted(self.records.items()):
+            detail = ', '.join(f"{key} {seconds:.1f}秒" for key, seconds in values.items())
+            lines.append(f"   {name}: {detail}")
+        return lines
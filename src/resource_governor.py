@@ -0,0 +1,185 @@
+"""
+ホストリソース ガバナー
+
+ホストの CPU 使用率・空きメモリ・/dev/shm 使用率・ワーカーごとのビデオ停止率を定期的に計測し、
+並行再生するワーカー数を設定範囲内で増減する
+- 逼迫している指標があれば1つ減らし、すべてに余裕があれば1つ増やす
+- 変更後は一定時間様子を見る（増減を繰り返さないように）
+- 判断の内容はログと実行結果サマリーに出力する
+
+psutil があれば使い、なければ Linux の /proc から読み取る（どちらもない指標は判断に使わない）。
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+@dataclass
+class HostSample:
+    """ホストリソースの計測値（計測できない項目は None）"""
+    cpu_percent: float = None
+    mem_available_mb: float = None
+    shm_used_percent: float = None
+    stall_rate: float = None   # ワーカーごとの停止時間の割合（最大値、0.0-1.0）
+
+    def describe(self):
+        parts = []
+        if self.cpu_percent is not None:
+            parts.append(f"CPU {self.cpu_percent:.0f}%")
+        if self.mem_available_mb is not None:
+            parts.append(f"空きメモリ {self.mem_available_mb:.0f}MB")
+        if self.shm_used_percent is not None:
+            parts.append(f"/dev/shm {self.shm_used_percent:.0f}%")
+        if self.stall_rate is not None:
+            parts.append(f"停止率 {self.stall_rate * 100:.0f}%")
+        return ', '.join(parts) or '計測値なし'
+
+
+def _read_cpu_times():
+    """/proc/stat から (アイドル時間, 合計時間) を返す"""
+    with open('/proc/stat', 'r') as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+    return idle, sum(values)
+
+
+def _read_mem_available_mb():
+    with open('/proc/meminfo', 'r') as f:
+        for line in f:
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def _read_shm_used_percent():
+    stat = os.statvfs('/dev/shm')
+    total = stat.f_blocks * stat.f_frsize
+    if not total:
+        return None
+    return (1 - stat.f_bavail * stat.f_frsize / total) * 100
+
+
+class ResourceGovernor:
+    """ホストの状態に応じて並行ワーカー数の目標値を決める"""
+
+    def __init__(self, min_workers, max_workers, stall_seconds=None,
+                 cpu_high=85, mem_low_mb=1024, worker_mem_mb=600, shm_high=80, stall_high=0.10,
+                 interval=30, cooldown=90):
+        """
+        min_workers / max_workers: ワーカー数の範囲
+        stall_seconds(): {ワーカー名: 停止時間の累計秒} を返す関数（停止率の計算に使う）
+        cpu_high: これを超えたら減らす CPU 使用率（%）
+        mem_low_mb: 空きメモリがこれを下回ったら減らす（増やすのは worker_mem_mb 分の余裕がある場合）
+        shm_high: これを超えたら減らす /dev/shm 使用率（%）
+        stall_high: これを超えたら減らすワーカーの停止率（計測間隔に対する停止時間の割合）
+        interval: 計測間隔（秒）、cooldown: ワーカー数を変えてから次に変えるまでの最短秒数
+        """
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.stall_seconds = stall_seconds
+        self.cpu_high = cpu_high
+        self.mem_low_mb = mem_low_mb
+        self.worker_mem_mb = worker_mem_mb
+        self.shm_high = shm_high
+        self.stall_high = stall_high
+        self.interval = interval
+        self.cooldown = cooldown
+        self.decisions = []   # (時刻, 変更前, 変更後, 理由)
+        self._last_sample_at = None
+        self._last_change_at = None
+        self._last_cpu = None
+        self._last_stalls = {}
+
+    def due(self):
+        """次の計測時刻になったか"""
+        return self._last_sample_at is None or time.monotonic() - self._last_sample_at >= self.interval
+
+    def sample(self):
+        """ホストリソースを計測する"""
+        now = time.monotonic()
+        elapsed = now - self._last_sample_at if self._last_sample_at else None
+        self._last_sample_at = now
+        sample = HostSample()
+
+        try:
+            if psutil:
+                sample.cpu_percent = psutil.cpu_percent(interval=None)
+                sample.mem_available_mb = psutil.virtual_memory().available / (1024 * 1024)
+            else:
+                idle, total = _read_cpu_times()
+                if self._last_cpu and total > self._last_cpu[1]:
+                    sample.cpu_percent = (1 - (idle - self._last_cpu[0]) / (total - self._last_cpu[1])) * 100
+                self._last_cpu = (idle, total)
+                sample.mem_available_mb = _read_mem_available_mb()
+        except Exception as e:
+            logging.debug(f"CPU・メモリの計測エラー: {e}")
+        try:
+            sample.shm_used_percent = _read_shm_used_percent()
+        except Exception:
+            pass  # /dev/shm がない環境（Windows・macOS）
+
+        if self.stall_seconds:
+            try:
+                stalls = dict(self.stall_seconds())
+            except RuntimeError:
+                stalls = self._last_stalls  # 他のスレッドが更新中（次回の計測に回す）
+            if elapsed:
+                rates = [(seconds - self._last_stalls.get(name, 0.0)) / elapsed for name, seconds in stalls.items()]
+                sample.stall_rate = max(rates, default=0.0)
+            self._last_stalls = stalls
+        return sample
+
+    def decide(self, active):
+        """
+        計測してワーカー数の目標値を返す（active: 現在のワーカー数）
+
+        増減する場合は判断内容をログに出力し、decisions に記録する。
+        """
+        first = self._last_sample_at is None
+        sample = self.sample()
+        if first:
+            return active  # 初回は差分を取るための基準値を記録するだけ
+        target = active
+        reason = None
+
+        pressures = []
+        if sample.cpu_percent is not None and sample.cpu_percent > self.cpu_high:
+            pressures.append(f"CPU {sample.cpu_percent:.0f}% > {self.cpu_high}%")
+        if sample.mem_available_mb is not None and sample.mem_available_mb < self.mem_low_mb:
+            pressures.append(f"空きメモリ {sample.mem_available_mb:.0f}MB < {self.mem_low_mb}MB")
+        if sample.shm_used_percent is not None and sample.shm_used_percent > self.shm_high:
+            pressures.append(f"/dev/shm {sample.shm_used_percent:.0f}% > {self.shm_high}%")
+        if sample.stall_rate is not None and sample.stall_rate > self.stall_high:
+            pressures.append(f"停止率 {sample.stall_rate * 100:.0f}% > {self.stall_high * 100:.0f}%")
+
+        cooling = self._last_change_at is not None and time.monotonic() - self._last_change_at < self.cooldown
+        if pressures and active > self.min_workers and not cooling:
+            target, reason = active - 1, ', '.join(pressures)
+        elif not pressures and active < self.max_workers and not cooling:
+            # 1つ増やしても余裕が残る場合のみ増やす
+            headroom = (
+                (sample.cpu_percent is None or sample.cpu_percent < self.cpu_high - 20)
+                and (sample.mem_available_mb is None or sample.mem_available_mb > self.mem_low_mb + self.worker_mem_mb)
+                and (sample.stall_rate is None or sample.stall_rate < self.stall_high / 2)
+            )
+            if headroom:
+                target, reason = active + 1, f"余裕あり（{sample.describe()}）"
+
+        logging.debug(f"ガバナー計測: {sample.describe()}（ワーカー {active}）")
+        if target != active:
+            self._last_change_at = time.monotonic()
+            self.decisions.append((time.strftime('%H:%M:%S'), active, target, reason))
+            arrow = '⬆️' if target > active else '⬇️'
+            logging.info(f"{arrow} ワーカー数を {active} → {target} に変更します: {reason}")
+        return target
+
+    def summary_lines(self):
+        """ワーカー数の変更履歴を文字列のリストで返す"""
+        return [f"   {at} {before} → {after}: {reason}" for at, before, after, reason in self.decisions]
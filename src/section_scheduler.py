@@ -0,0 +1,117 @@
+"""
+セクション割り当てスケジューラー
+
+過去の実行で記録したセクションごとの所要時間をもとに、
+長いセクションから順に「最も早く空くワーカー」へ割り当てる（LPT: Longest Processing Time first）
+- 所要時間が記録されていないセクションは既知の平均（なければ既定値）で見積もる
+- 開始前にワーカーごとの予定終了時刻を表示する
+"""
+
+import os
+import json
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+
+# 各スクリプトの load_dotenv() より先に import されるため、ここで .env を読み込む
+load_dotenv()
+
+SECTION_DURATIONS_FILE = os.getenv('SECTION_DURATIONS_FILE', 'section_durations.json')
+
+# 所要時間の記録が1つもない場合の見積もり（秒）
+DEFAULT_SECTION_SECONDS = 1800
+
+
+class SectionDurations:
+    """コースごとのセクション所要時間（秒）を記録・見積もりする"""
+
+    def __init__(self, course, path=SECTION_DURATIONS_FILE):
+        self.course = course
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.warning(f"セクション所要時間ファイル読み込みエラー: {e}")
+        return {}
+
+    def _known(self):
+        return self.data.get(self.course, {})
+
+    def record(self, section_index, seconds):
+        """セクションの所要時間を記録してファイルに保存"""
+        with self._lock:
+            self.data.setdefault(self.course, {})[str(section_index)] = round(seconds, 1)
+            try:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                logging.warning(f"セクション所要時間保存エラー: {e}")
+
+    def is_known(self, section_index):
+        return str(section_index) in self._known()
+
+    def estimate(self, section_index):
+        """セクションの見積もり所要時間（秒）"""
+        known = self._known()
+        if str(section_index) in known:
+            return known[str(section_index)]
+        if known:
+            return sum(known.values()) / len(known)
+        return DEFAULT_SECTION_SECONDS
+
+
+def _list_schedule(sections, estimates, worker_count):
+    """sections の順に最も早く空くワーカーへ割り当てる（共有キューから取り出す場合と同じ）"""
+    heap = [(0.0, i) for i in range(worker_count)]
+    assignments = [[] for _ in range(worker_count)]
+    loads = [0.0] * worker_count
+    for section_index in sections:
+        load, worker = heapq.heappop(heap)
+        assignments[worker].append(section_index)
+        loads[worker] = load + estimates[section_index]
+        heapq.heappush(heap, (loads[worker], worker))
+    return assignments, loads
+
+
+def plan_lpt(sections, durations, worker_count):
+    """
+    LPT で割り当て順を決める
+
+    戻り値: (キューに入れる順のセクションリスト, ワーカーごとの割り当て, ワーカーごとの見積もり合計秒,
+             セクション番号順に割り当てた場合の最大終了秒)
+
+    ワーカーは共有キューから空いた順に取り出すため、長い順に並べたキューが
+    「最も早く空くワーカーに次に長いセクションを渡す」LPT そのものになる。
+    """
+    estimates = {i: durations.estimate(i) for i in sections}
+    order = sorted(sections, key=lambda i: (-estimates[i], i))
+    assignments, loads = _list_schedule(order, estimates, worker_count)
+    _, index_loads = _list_schedule(sections, estimates, worker_count)
+    return order, assignments, loads, max(index_loads, default=0.0)
+
+
+def plan_lines(assignments, loads, index_makespan, durations, start=None, worker_label='worker'):
+    """ワーカーごとの予定終了時刻を文字列のリストで返す"""
+    start = start or datetime.now()
+    lines = []
+    for worker, (sections, load) in enumerate(zip(assignments, loads), 1):
+        finish = start + timedelta(seconds=load)
+        marked = ', '.join(f"{i}" if durations.is_known(i) else f"{i}?" for i in sections)
+        lines.append(
+            f"   {worker_label}-{worker}: セクション [{marked}] 見積もり {load / 60:.0f}分 → 終了予定 {finish.strftime('%H:%M')}"
+        )
+    makespan = max(loads, default=0.0)
+    lines.append(
+        f"   全体の終了予定: {(start + timedelta(seconds=makespan)).strftime('%H:%M')}"
+        f"（番号順の割り当てより {max(index_makespan - makespan, 0) / 60:.0f}分短縮、? は所要時間の記録なし）"
+    )
+    return lines
@@ -0,0 +1,141 @@
+"""
+セレクタ実績ストア
+
+どのセレクタで要素が見つかったか・空振りで何秒失ったかを
+ページ種別（URLパターン）ごとに記録し、次回以降の試行順に反映する
+- 試行順は最近の成功率（古い結果ほど重みを下げる）で決めるため、以前よく成功していても
+  最近空振りばかりのセレクタは後ろに回る
+- ファイルへは終了時にまとめて保存する（変更があった場合のみ）
+"""
+
+import os
+import re
+import json
+import atexit
+import logging
+import threading
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+
+# 各スクリプトの load_dotenv() より先に import されるため、ここで .env を読み込む
+load_dotenv()
+
+SELECTOR_STATS_FILE = os.getenv('SELECTOR_STATS_FILE', 'selector_stats.json')
+
+# セレクタ候補がすべて空振りした場合の記録名
+NO_MATCH = '(一致なし)'
+
+# 最近の成功率を更新するときの最新の結果の重み（残りは過去の成功率）
+RECENT_WEIGHT = 0.3
+
+
+def url_pattern(url):
+    """URL から ID 部分を * に置き換えたパターンを作る（例: /members/*/course/*）"""
+    try:
+        path = urlparse(url or '').path
+    except Exception:
+        return ''
+    segments = []
+    for segment in path.strip('/').split('/'):
+        # 数字を含む・長いランダム文字列のセグメントは ID とみなす
+        if re.search(r'\d', segment) or len(segment) >= 12:
+            segments.append('*')
+        else:
+            segments.append(segment)
+    return '/' + '/'.join(segments)
+
+
+class SelectorStats:
+    """セレクタごとの成功回数・空振り時間を記録し、試行順を並べ替える"""
+
+    def __init__(self, path=SELECTOR_STATS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = self._load()
+        # 今回の実行で空振りにより失った秒数（種別ごと）
+        self.run_lost = {}
+        self.run_misses = {}
+        self._dirty = False
+        atexit.register(self.save)
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.warning(f"セレクタ実績ファイル読み込みエラー: {e}")
+        return {}
+
+    def save(self):
+        """実績をファイルに保存（前回の保存から変更がない場合は何もしない）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False, indent=2)
+                self._dirty = False
+            except Exception as e:
+                logging.warning(f"セレクタ実績保存エラー: {e}")
+
+    def _entry(self, kind, url, selector):
+        key = f"{kind}:{url_pattern(url)}"
+        return self.data.setdefault(key, {}).setdefault(selector, {'hits': 0, 'misses': 0, 'miss_seconds': 0.0})
+
+    @staticmethod
+    def _rate(entry):
+        """最近の成功率（記録がない古いファイルでは通算の成功率）"""
+        if 'rate' in entry:
+            return entry['rate']
+        tries = entry.get('hits', 0) + entry.get('misses', 0)
+        return entry.get('hits', 0) / tries if tries else 0.0
+
+    def _update(self, entry, hit):
+        entry['rate'] = self._rate(entry) * (1 - RECENT_WEIGHT) + (RECENT_WEIGHT if hit else 0.0)
+        self._dirty = True
+
+    def ordered(self, kind, url, selectors):
+        """最近よく成功するセレクタが先頭に来るよう並べ替えたリストを返す"""
+        entries = self.data.get(f"{kind}:{url_pattern(url)}", {})
+
+        def sort_key(item):
+            index, selector = item
+            e = entries.get(selector, {})
+            # 最近の成功率が高い順 → 空振り時間が短い順 → 元の順番
+            return (-self._rate(e), e.get('miss_seconds', 0.0), index)
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=sort_key)]
+
+    def record_hit(self, kind, url, selector):
+        """セレクタで要素が見つかったことを記録"""
+        with self._lock:
+            entry = self._entry(kind, url, selector)
+            self._update(entry, hit=True)
+            entry['hits'] += 1
+
+    def record_miss(self, kind, url, selector, seconds):
+        """セレクタが空振りし seconds 秒失ったことを記録"""
+        with self._lock:
+            entry = self._entry(kind, url, selector)
+            self._update(entry, hit=False)
+            entry['misses'] += 1
+            entry['miss_seconds'] += seconds
+            self.run_lost[kind] = self.run_lost.get(kind, 0.0) + seconds
+            self.run_misses[kind] = self.run_misses.get(kind, 0) + 1
+
+    def total_lost(self):
+        """今回の実行で空振りにより失った合計秒数"""
+        return sum(self.run_lost.values())
+
+    def summary_lines(self):
+        """今回の実行での種別ごとの空振り時間を文字列のリストで返す"""
+        return [
+            f"   {kind}: 空振り {self.run_misses.get(kind, 0)}回, {seconds:.1f}秒"
+            for kind, seconds in self.run_lost.items()
+        ]
+
+
+# 各スクリプト共通のインスタンス
+selector_stats = SelectorStats()
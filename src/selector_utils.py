@@ -0,0 +1,205 @@
+"""
+セレクタ解決ユーティリティ
+
+複数の XPath 候補を1つずつ WebDriverWait で試す代わりに、
+ページ内で全候補をまとめて評価するためのモジュール
+- 再生ボタンなどの XPath 候補の一括評価
+- 「次へ」ボタンの一括検索
+- 過去の実績に基づくセレクタ候補の並べ替え（selector_stats）
+"""
+
+import time
+import logging
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selector_stats import selector_stats, NO_MATCH
+
+
+# 再生ボタンの候補（上から優先）
+PLAY_BUTTON_SELECTORS = [
+    '//button[contains(@aria-label, "play") or contains(@aria-label, "再生")]',
+    '//button[@class and contains(@class, "play")]',
+    '//div[contains(@class, "video")]//button',
+    '//div[contains(@class, "player")]//button',
+    '//button[contains(@class, "vjs-big-play-button")]',  # Video.js
+    '//div[@class and contains(@class, "play")]',
+]
+
+# 「次へ」ボタンの候補（テキストで見つからない場合のフォールバック）
+NEXT_BUTTON_SELECTORS = [
+    '//button[contains(text(), "次へ")]',
+    '//a[contains(text(), "次へ")]',
+    '//button[contains(@class, "next")]',
+    '//a[contains(@class, "next")]',
+]
+
+# コンテンツページからセクション一覧に戻るボタンの候補
+BACK_BUTTON_SELECTORS = [
+    '//button[@aria-label="戻る" or contains(@class, "back")]',
+    '//a[contains(@href, "/course/")]',
+    '//button[contains(text(), "戻る")]',
+    '//a[contains(text(), "Home")]',
+]
+
+# 全候補を1回の execute_script で評価し、最初に見つかった要素と候補番号を返すスクリプト
+# arguments[0]: XPath のリスト, arguments[1]: 表示・有効な要素のみ対象にするか
+_RESOLVE_SCRIPT = """
+const selectors = arguments[0];
+const requireClickable = arguments[1];
+const isUsable = (el) => {
+    if (!requireClickable) return true;
+    if (el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    const style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden' || style.pointerEvents === 'none') return false;
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+};
+for (let i = 0; i < selectors.length; i++) {
+    let snapshot;
+    try {
+        snapshot = document.evaluate(selectors[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    } catch (e) {
+        continue;
+    }
+    for (let j = 0; j < snapshot.snapshotLength; j++) {
+        const el = snapshot.snapshotItem(j);
+        if (el.nodeType === 1 && isUsable(el)) return [el, i];
+    }
+}
+return null;
+"""
+
+
+def resolve_selector(driver, selectors, timeout=3, clickable=True, poll_frequency=0.5, kind=None):
+    """
+    selectors の全候補をページ内で一括評価し、最初に一致した要素を返す
+
+    clickable=True の場合は表示されていて有効な要素のみを対象にする。
+    見つからない場合は timeout 秒まで poll_frequency 間隔で再評価する
+    （候補ごとに待機しないため、ボタンがないページでも最大 timeout 秒で終わる）。
+    kind を指定すると過去の実績順に候補を並べ替え、結果を selector_stats に記録する。
+
+    戻り値: (要素, 一致したセレクタ) または (None, None)
+    """
+    url = driver.current_url if kind else None
+    if kind:
+        selectors = selector_stats.ordered(kind, url, selectors)
+    start = time.monotonic()
+    deadline = start + timeout
+    while True:
+        try:
+            result = driver.execute_script(_RESOLVE_SCRIPT, list(selectors), clickable)
+        except Exception as e:
+            logging.debug(f"  セレクタ一括評価エラー: {e}")
+            result = None
+
+        if result:
+            element, index = result
+            if kind:
+                selector_stats.record_hit(kind, url, selectors[int(index)])
+            return element, selectors[int(index)]
+
+        if time.monotonic() >= deadline:
+            if kind:
+                selector_stats.record_miss(kind, url, NO_MATCH, time.monotonic() - start)
+            return None, None
+        time.sleep(poll_frequency)
+
+
+def try_selectors(driver, kind, selectors, timeout=3, condition=EC.element_to_be_clickable,
+                  action=None, page_selectors=()):
+    """
+    selectors を過去の実績順に1つずつ WebDriverWait で試し、最初に見つかった要素を返す
+
+    成功したセレクタと、空振りしたセレクタの待機時間を selector_stats に記録する。
+    action: 見つかった要素に行う操作（例: クリック）。失敗した場合は空振りとして次の候補を試す。
+    page_selectors: ページのテキストから作った候補。ページごとに変わるため実績には記録せず、
+                    selectors より先にそのままの順で試す。
+    戻り値: (要素, 一致したセレクタ) または (None, None)
+    """
+    url = driver.current_url
+    candidates = [(selector, False) for selector in page_selectors]
+    candidates += [(selector, True) for selector in selector_stats.ordered(kind, url, selectors)]
+    for selector, ranked in candidates:
+        start = time.monotonic()
+        try:
+            element = WebDriverWait(driver, timeout).until(condition((By.XPATH, selector)))
+            if action:
+                action(element)
+        except Exception as e:
+            if action:
+                logging.debug(f"  セレクタの空振り（{selector}）: {e}")
+            if ranked:
+                selector_stats.record_miss(kind, url, selector, time.monotonic() - start)
+            continue
+        if ranked:
+            selector_stats.record_hit(kind, url, selector)
+        return element, selector
+    return None, None
+
+
+# 「次へ」ボタンをテキスト・aria-label・class からページ内で一括検索するスクリプト
+# 優先度: テキスト一致 > aria-label 一致 > class 一致（同じ優先度なら DOM 順）
+_FIND_NEXT_SCRIPT = """
+const isUsable = (el) => {
+    if (el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    const style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden' || style.pointerEvents === 'none') return false;
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+};
+const matches = (value) => {
+    if (!value) return false;
+    return value.includes('次へ') || value.toLowerCase().includes('next');
+};
+let best = null;
+const candidates = document.querySelectorAll('button, a, [role="button"]');
+for (const el of candidates) {
+    let rank = null;
+    let label = '';
+    const text = (el.innerText || el.textContent || '').trim();
+    if (matches(text)) { rank = 0; label = text; }
+    else if (matches(el.getAttribute('aria-label'))) { rank = 1; label = el.getAttribute('aria-label'); }
+    else if (typeof el.className === 'string' && el.className.toLowerCase().includes('next')) { rank = 2; label = 'class=' + el.className; }
+    if (rank === null || !isUsable(el)) continue;
+    if (best === null || rank < best.rank) best = {el: el, rank: rank, label: label};
+    if (rank === 0) break;
+}
+return best ? [best.el, best.label] : null;
+"""
+
+
+def find_next_button(driver, timeout=5, poll_frequency=0.5):
+    """
+    「次へ」ボタン（またはリンク）を1回の execute_script で検索してクリック可能な要素を返す
+
+    要素ごとに .text を取得する往復がなくなるため、DOM の大きさに関係なく一定時間で終わる。
+    見つからない場合は timeout 秒まで poll_frequency 間隔で再検索する。
+
+    戻り値: (要素, 一致したテキストまたは属性) または (None, None)
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = driver.execute_script(_FIND_NEXT_SCRIPT)
+        except Exception as e:
+            logging.debug(f"  「次へ」ボタン検索エラー: {e}")
+            result = None
+
+        if result:
+            element, label = result
+            return element, label
+
+        if time.monotonic() >= deadline:
+            return None, None
+        time.sleep(poll_frequency)
+
+
+def click_element(driver, element):
+    """要素をクリック（通常クリックに失敗した場合は JavaScript でクリック）"""
+    try:
+        element.click()
+    except Exception as click_e:
+        logging.debug(f"  通常クリック失敗、JavaScriptでクリックします: {click_e}")
+        driver.execute_script("arguments[0].click();", element)
@@ -0,0 +1,95 @@
+"""
+ログインセッション共有
+
+最初にログインしたブラウザの Cookie・localStorage・sessionStorage を書き出し、
+後から起動したブラウザに注入してログインフォームを経由せずにコース画面を開く
+（保存済みプロファイルのセッションが有効かどうかの確認にも使う）
+"""
+
+import logging
+from urllib.parse import urlparse
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+# ストレージの内容を {key: value} で取得するスクリプト
+_EXPORT_STORAGE_SCRIPT = """
+const dump = (storage) => {
+    const items = {};
+    for (let i = 0; i < storage.length; i++) {
+        const key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+};
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_IMPORT_STORAGE_SCRIPT = """
+const state = arguments[0];
+for (const [key, value] of Object.entries(state.local || {})) window.localStorage.setItem(key, value);
+for (const [key, value] of Object.entries(state.session || {})) window.sessionStorage.setItem(key, value);
+"""
+
+_LISTING_XPATH = '//button[contains(text(), "受講する")]'
+
+
+def _origin(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+def export_session(driver):
+    """ログイン済みブラウザのセッション状態（Cookie・ストレージ）を辞書で返す"""
+    try:
+        storage = driver.execute_script(_EXPORT_STORAGE_SCRIPT) or {}
+    except Exception as e:
+        logging.debug(f"ストレージ取得エラー: {e}")
+        storage = {}
+    state = {
+        'origin': _origin(driver.current_url),
+        'cookies': driver.get_cookies(),
+        'storage': storage,
+    }
+    logging.info(f"🍪 セッション状態を書き出しました（Cookie {len(state['cookies'])}個）")
+    return state
+
+
+def is_logged_in(driver, url, timeout=10):
+    """
+    url を開き、ログイン済みの画面（「受講する」ボタン）が表示されたかを返す
+
+    ログインフォームが表示された場合はタイムアウトを待たずに False を返す。
+    """
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(EC.any_of(
+        EC.presence_of_element_located((By.XPATH, _LISTING_XPATH)),
+        EC.presence_of_element_located((By.NAME, 'email')),
+    ))
+    return bool(driver.find_elements(By.XPATH, _LISTING_XPATH))
+
+
+def import_session(driver, state, url, timeout=10):
+    """
+    セッション状態を注入して url を開き、ログイン済みの画面が表示されたかを返す
+
+    ログインフォームが表示された場合（セッションが拒否された場合）はすぐに False を返す。
+    """
+    try:
+        # Cookie は同じドメインのページを開いてからでないと設定できない
+        driver.get(state['origin'])
+        for cookie in state.get('cookies', []):
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logging.debug(f"Cookie 設定エラー（{cookie.get('name')}）: {e}")
+        driver.execute_script(_IMPORT_STORAGE_SCRIPT, state.get('storage', {}))
+
+        if is_logged_in(driver, url, timeout):
+            logging.info("✅ 共有セッションでログイン済みの画面を開きました")
+            return True
+        logging.warning("⚠️ 共有セッションが拒否されました（ログイン画面が表示されました）")
+    except Exception as e:
+        logging.warning(f"⚠️ 共有セッションの注入に失敗しました: {e}")
+    return False
@@ -0,0 +1,127 @@
+"""
+サイトへのアクセス制御
+
+複数のワーカーが同時にログイン・ページ遷移してサイトに負荷をかけないためのモジュール
+- トークンバケットで全ワーカー合計のアクセス頻度を制限する
+- 失敗（読み込みのタイムアウトなど）が続いたらサーキットブレーカーを開き、全ワーカーを一時停止する
+- 停止時間は開くたびに倍に延ばし、成功したら元に戻す
+"""
+
+import time
+import logging
+import threading
+
+
+class TokenBucket:
+    """1分あたり rate_per_minute 回、最大 burst 回まで連続で許可するトークンバケット（0 以下は制限なし）"""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = max(rate_per_minute, 0) / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ取得するまで待つ（待った秒数を返す）"""
+        if self.rate <= 0:
+            return 0.0
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - start
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    連続 failure_threshold 回の失敗で開き、cooldown 秒間すべての呼び出し元を待たせる
+
+    停止時間が明けた後の最初の結果で判定し、成功なら閉じて停止時間を元に戻す。
+    失敗なら停止時間を倍（最大 max_cooldown 秒）にして再び開く。
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60, max_cooldown=600):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.trips = 0
+        self.paused_seconds = 0.0
+        self._open_until = 0.0
+        self._half_open = False
+        self._lock = threading.Lock()
+
+    def wait_until_closed(self):
+        """開いている間は待つ（待った秒数を返す）"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    def record_success(self):
+        with self._lock:
+            if self._half_open:
+                logging.info("✅ サイトへのアクセスが回復しました。全ワーカーを再開します")
+            self.failures = 0
+            self._half_open = False
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self, reason):
+        with self._lock:
+            if time.monotonic() < self._open_until:
+                return  # 停止前に始まったアクセスの失敗は数えない
+            self.failures += 1
+            if self._half_open:
+                # 停止明けの最初のアクセスも失敗した場合は停止時間を延ばして再び開く
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.failures < self.failure_threshold:
+                return
+            self.trips += 1
+            self.failures = 0
+            self._half_open = True
+            self._open_until = time.monotonic() + self.cooldown
+            self.paused_seconds += self.cooldown
+            logging.warning(f"🛑 サイトへのアクセス失敗が続いたため、全ワーカーを {self.cooldown:.0f}秒停止します（{reason}）")
+
+
+class SiteGuard:
+    """アクセス頻度の制限とサーキットブレーカーをまとめて適用する"""
+
+    def __init__(self, rate_per_minute=30, burst=5, failure_threshold=5, cooldown=60):
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.throttled = {}   # 種類 -> 頻度制限で待った秒数
+        self._lock = threading.Lock()
+
+    def before_request(self, kind):
+        """ログイン・ページ遷移の前に呼ぶ（停止中・頻度超過の場合は待つ）"""
+        self.breaker.wait_until_closed()
+        waited = self.bucket.acquire()
+        if waited >= 0.05:
+            with self._lock:
+                self.throttled[kind] = self.throttled.get(kind, 0.0) + waited
+
+    def success(self):
+        self.breaker.record_success()
+
+    def failure(self, reason):
+        self.breaker.record_failure(reason)
+
+    def summary_lines(self):
+        """頻度制限で待った時間・サーキットブレーカーの作動回数を文字列のリストで返す"""
+        lines = [f"   {kind}: 頻度制限で {seconds:.1f}秒待機" for kind, seconds in self.throttled.items()]
+        if self.breaker.trips:
+            lines.append(f"   サーキットブレーカー: {self.breaker.trips}回作動（停止 {self.breaker.paused_seconds:.0f}秒）")
+        return lines
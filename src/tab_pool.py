@@ -0,0 +1,113 @@
+"""
+マルチタブ再生
+
+1つの Chrome の中で複数のタブを開き、タブごとに別のセクションを同時に再生する
+- 各タブの処理はジェネレーターで書き、待機したい秒数を yield する
+- 待機時間が最も早く明けるタブに切り替えて処理を再開する（WebDriver の操作は常に1タブずつ）
+- 背景タブでも実時間で再生されるよう、Chrome はスロットリングを無効にして起動する
+"""
+
+import time
+import logging
+
+
+# 背景タブのタイマー・レンダラーのスロットリングを無効にする Chrome の起動オプション
+BACKGROUND_TAB_ARGUMENTS = [
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--autoplay-policy=no-user-gesture-required',
+]
+
+
+class _TabSlot:
+    """1つのタブで実行中のセクション"""
+
+    def __init__(self, name):
+        self.name = name
+        self.handle = None
+        self.handles = set()
+        self.section_index = None
+        self.steps = None
+        self.due = 0.0
+
+
+def run_tab_pool(driver, sections, tab_count, section_steps):
+    """
+    sections を1つのブラウザの tab_count 個のタブで同時に再生する
+
+    sections: 再生するセクション番号のリスト（この順にタブへ割り当てる）
+    section_steps(driver, section_index, position, name): セクションを再生するジェネレーター（name はタブ名）
+        次に再開してほしいまでの秒数を yield し、成否を return する。
+        再開時はそのタブ（またはそのタブから開いたウィンドウ）に切り替え済みで呼ばれる。
+
+    最初に開いていたウィンドウ（セクション一覧）は閉じずに残す。
+    戻り値: {セクション番号: ジェネレーターの戻り値} の辞書（処理できなかったセクションは False）
+    """
+    pending = list(enumerate(sections, 1))
+    results = {}
+    home_handle = driver.current_window_handle
+    slots = [_TabSlot(f'tab-{i + 1}') for i in range(tab_count)]
+
+    def start(slot):
+        """空いているタブに次のセクションを割り当てる"""
+        position, section_index = pending.pop(0)
+        driver.switch_to.window(home_handle)
+        driver.switch_to.new_window('tab')
+        slot.handle = driver.current_window_handle
+        slot.handles = {slot.handle}
+        slot.section_index = section_index
+        slot.steps = section_steps(driver, section_index, position, slot.name)
+        slot.due = time.monotonic()
+        logging.info(f"🗂️  {slot.name}: セクション {section_index} を担当します")
+
+    def finish(slot, ok):
+        """セクションの結果を記録し、そのタブで開いたウィンドウを閉じる"""
+        results[slot.section_index] = ok
+        for handle in slot.handles:
+            if handle == home_handle:
+                continue
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception as e:
+                logging.debug(f"  {slot.name}: タブを閉じる際のエラー: {e}")
+        slot.steps = None
+        try:
+            driver.switch_to.window(home_handle)
+        except Exception:
+            pass
+
+    for slot in slots:
+        if pending:
+            start(slot)
+
+    while any(slot.steps for slot in slots):
+        # 待機時間が最も早く明けるタブを再開
+        slot = min((s for s in slots if s.steps), key=lambda s: s.due)
+        delay = slot.due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        before = set(driver.window_handles)
+        try:
+            driver.switch_to.window(slot.handle)
+            interval = next(slot.steps)
+        except StopIteration as stop:
+            finish(slot, stop.value)
+        except Exception as e:
+            logging.error(f"❌ {slot.name}: セクション {slot.section_index} でエラー: {e}")
+            finish(slot, False)
+        else:
+            # 処理中に開いたウィンドウはこのタブのものとして扱う
+            slot.handles |= set(driver.window_handles) - before
+            slot.handle = driver.current_window_handle
+            slot.due = time.monotonic() + interval
+            continue
+
+        if pending:
+            start(slot)
+
+    for section_index in sections:
+        results.setdefault(section_index, False)
+    return results
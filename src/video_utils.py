@@ -0,0 +1,578 @@
+"""
+ビデオ再生監視ユーティリティ
+
+各スクリプトの play_content から共通で使うビデオ監視処理をまとめたモジュール
+- ビデオ要素へのイベントリスナー注入による終了検出
+- 再生状態のスナップショット取得（1回の execute_script で全項目を取得）
+- 残り時間に応じたポーリング間隔の調整
+- ビデオ要素を含むフレームの特定（URLパターンごとにキャッシュ）
+- ビデオ要素の生存確認と再取得（プレイヤー再描画時の stale 要素対策）
+- 停止の種類（一時停止・再バッファ・エラー）の判別と段階的な復旧
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import StaleElementReferenceException
+from selector_stats import url_pattern
+
+
+# 1回の execute_async_script で待機する最大秒数
+# （WebDriver の HTTP タイムアウトに掛からないよう分割して待機する）
+EVENT_WAIT_CHUNK = 300
+
+# イベント方式で再生位置がこの秒数進まなければ停止とみなしてポーリングに切り替える
+EVENT_STALL_TIMEOUT = 10
+
+# イベント方式で一時停止がこの回数続けて検出されたら（play() で再開できない）ポーリングに切り替える
+EVENT_PAUSE_RETRIES = 3
+
+# 再生状態を1回の往復でまとめて取得するスクリプト
+_VIDEO_STATE_SCRIPT = """
+const video = arguments[0];
+// waiting / stalled イベントの発生回数を数えるリスナーを一度だけ登録
+if (!video.__ceStallHooked) {
+    video.__ceStallHooked = true;
+    video.__ceWaiting = 0;
+    video.__ceStalled = 0;
+    video.addEventListener('waiting', () => { video.__ceWaiting++; });
+    video.addEventListener('stalled', () => { video.__ceStalled++; });
+}
+const buffered = [];
+for (let i = 0; i < video.buffered.length; i++) {
+    buffered.push([video.buffered.start(i), video.buffered.end(i)]);
+}
+return {
+    currentTime: video.currentTime,
+    duration: video.duration,
+    paused: video.paused,
+    ended: video.ended,
+    readyState: video.readyState,
+    networkState: video.networkState,
+    buffered: buffered,
+    error: video.error ? video.error.code : null,
+    waitingEvents: video.__ceWaiting,
+    stalledEvents: video.__ceStalled,
+};
+"""
+
+
+@dataclass
+class VideoState:
+    """ビデオ要素の再生状態スナップショット"""
+    current_time: float = 0.0
+    duration: float = 0.0
+    paused: bool = True
+    ended: bool = False
+    ready_state: int = 0      # HTMLMediaElement.readyState（0-4）
+    network_state: int = 0    # HTMLMediaElement.networkState（0-3）
+    buffered: list = field(default_factory=list)  # [(開始秒, 終了秒), ...]
+    error: int = None         # MediaError.code（エラーなしは None）
+    waiting_events: int = 0   # これまでの waiting イベント数
+    stalled_events: int = 0   # これまでの stalled イベント数
+
+    @property
+    def buffered_ahead(self):
+        """現在位置から先に読み込み済みの秒数"""
+        for start, end in self.buffered:
+            if start <= self.current_time <= end:
+                return end - self.current_time
+        return 0.0
+
+    @property
+    def progress(self):
+        """再生進捗（%）"""
+        return (self.current_time / self.duration * 100) if self.duration > 0 else 0
+
+    def is_finished(self, margin=1):
+        """ビデオが終了したか（margin 秒の余裕を持たせる）"""
+        return self.ended or (self.duration > 0 and self.current_time >= self.duration - margin)
+
+
+def get_video_state(driver, video):
+    """ビデオの再生状態を1回の execute_script で取得して VideoState で返す"""
+    raw = driver.execute_script(_VIDEO_STATE_SCRIPT, video) or {}
+    duration = raw.get('duration')
+    return VideoState(
+        current_time=raw.get('currentTime') or 0.0,
+        # 読み込み前の duration は NaN（JSON では None）になる
+        duration=duration if isinstance(duration, (int, float)) and duration == duration else 0.0,
+        paused=bool(raw.get('paused')),
+        ended=bool(raw.get('ended')),
+        ready_state=raw.get('readyState') or 0,
+        network_state=raw.get('networkState') or 0,
+        buffered=[tuple(r) for r in raw.get('buffered') or []],
+        error=raw.get('error'),
+        waiting_events=raw.get('waitingEvents') or 0,
+        stalled_events=raw.get('stalledEvents') or 0,
+    )
+
+
+class PollScheduler:
+    """
+    残り時間と直近の再生速度から次のポーリング間隔を決めるスケジューラ
+
+    動画の中盤は間隔を広げ（最大 max_interval 秒）、終了間際や停止検出後は
+    min_interval 秒まで縮める。max_interval が終了検出の最悪遅延になる。
+    """
+
+    def __init__(self, min_interval=1.0, max_interval=30.0, stall_checks=5):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.stall_checks = stall_checks  # 停止後に短い間隔で確認する回数
+        self._last_time = None
+        self._last_wall = None
+        self._rate = None  # 実時間1秒あたりの再生秒数
+        self._fast_checks = 0
+
+    def next_interval(self, state):
+        """VideoState を受け取り、次の確認までの待機秒数を返す"""
+        now = time.monotonic()
+        if self._last_wall is not None and now > self._last_wall:
+            rate = (state.current_time - self._last_time) / (now - self._last_wall)
+            # 直近の値を重視した移動平均で再生速度を推定
+            # 停止・再開をまたいでは平均しない（平均では停止が下限を割るまで数回かかり、その間は長い間隔のままになる）
+            if self._rate is None or rate < 0.1 or self._rate < 0.1:
+                self._rate = rate
+            else:
+                self._rate = (self._rate + rate) / 2
+        self._last_time = state.current_time
+        self._last_wall = now
+
+        # 長さ不明・一時停止・進んでいない場合は短い間隔で様子を見る
+        if state.duration <= 0 or state.paused or self._rate is None or self._rate < 0.1:
+            self._fast_checks = self.stall_checks if self._rate is not None else 0
+            return self.min_interval
+        if self._fast_checks > 0:
+            self._fast_checks -= 1
+            return self.min_interval
+
+        # 終了までの実時間の半分だけ待つ（終了に近づくほど間隔が縮む）
+        remaining = max(state.duration - state.current_time, 0) / self._rate
+        return max(self.min_interval, min(self.max_interval, remaining / 2))
+
+
+# ビデオ終了・一時停止をイベントで待つスクリプト
+# arguments[0]: video要素, arguments[1]: 待機上限（ミリ秒）, arguments[2]: 停止判定（ミリ秒）, 最後の引数: コールバック
+_WAIT_FOR_END_SCRIPT = """
+const video = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const state = (reason) => ({
+    reason: reason,
+    currentTime: video.currentTime,
+    duration: video.duration,
+    paused: video.paused,
+    ended: video.ended,
+});
+const stallMs = arguments[2];
+const nearEnd = () => video.duration > 0 && video.currentTime >= video.duration - 1;
+if (video.ended || nearEnd()) { done(state('ended')); return; }
+if (video.paused) { done(state('paused')); return; }
+
+let finished = false;
+let timer = null;
+// 再生位置が stallMs 進まなければ停止（再バッファ等）として返す
+let lastTime = video.currentTime;
+let lastProgress = Date.now();
+const watchdog = setInterval(() => {
+    if (video.currentTime !== lastTime) {
+        lastTime = video.currentTime;
+        lastProgress = Date.now();
+    } else if (Date.now() - lastProgress >= stallMs) {
+        finish('stalled');
+    }
+}, 1000);
+const finish = (reason) => {
+    if (finished) return;
+    finished = true;
+    clearTimeout(timer);
+    clearInterval(watchdog);
+    video.removeEventListener('ended', onEnded);
+    video.removeEventListener('timeupdate', onTimeUpdate);
+    video.removeEventListener('pause', onPause);
+    done(state(reason));
+};
+const onEnded = () => finish('ended');
+const onTimeUpdate = () => { if (nearEnd()) finish('ended'); };
+const onPause = () => finish(nearEnd() ? 'ended' : 'paused');
+video.addEventListener('ended', onEnded);
+video.addEventListener('timeupdate', onTimeUpdate);
+video.addEventListener('pause', onPause);
+timer = setTimeout(() => finish('timeout'), timeoutMs);
+"""
+
+
+def wait_for_video_end(driver, video, max_wait, label=''):
+    """
+    ビデオ要素に ended/timeupdate リスナーを注入し、終了までブロックして待機
+
+    ポーリングの代わりに execute_async_script 1回（長尺の場合は EVENT_WAIT_CHUNK 秒ごと）で
+    待機するため、WebDriver の往復回数がほぼゼロになる。
+    一時停止を検出した場合は play() で再開して待機を続ける（EVENT_PAUSE_RETRIES 回続いたら諦める）。
+
+    戻り値: True=ビデオ終了, False=最大待機時間に到達,
+            None=再生位置が進まない・再生を再開できない・結果を取得できない
+                 （呼び出し側のポーリングで停止対応する）
+    例外: スクリプト実行自体に失敗した場合はそのまま送出（呼び出し側でポーリングにフォールバック）
+    """
+    elapsed = 0
+    consecutive_pauses = 0
+    while elapsed < max_wait:
+        chunk = min(EVENT_WAIT_CHUNK, max_wait - elapsed)
+        # スクリプトタイムアウトを待機時間より長く設定
+        driver.set_script_timeout(chunk + 10)
+        result = driver.execute_async_script(
+            _WAIT_FOR_END_SCRIPT, video, int(chunk * 1000), EVENT_STALL_TIMEOUT * 1000
+        )
+
+        if not result:
+            logging.warning("  ⚠️ ビデオの状態を取得できません。ポーリングに切り替えます")
+            return None
+        reason = result.get('reason')
+        current_time = result.get('currentTime') or 0
+        duration = result.get('duration') or 0
+
+        if reason == 'ended':
+            logging.info(f"  ✅ ビデオ再生完了（イベント検出）: {int(duration)}秒")
+            return True
+
+        if reason == 'stalled':
+            logging.warning(f"  ⚠️ 再生位置が {EVENT_STALL_TIMEOUT}秒進みません。停止対応のためポーリングに切り替えます")
+            return None
+
+        if reason == 'paused':
+            consecutive_pauses += 1
+            if consecutive_pauses > EVENT_PAUSE_RETRIES:
+                logging.warning(f"  ⚠️ {EVENT_PAUSE_RETRIES}回再生を試みても一時停止のままです。停止対応のためポーリングに切り替えます")
+                return None
+            logging.warning("  ⚠️ ビデオが一時停止しています。再生を試みます...")
+            try:
+                driver.execute_script("arguments[0].play();", video)
+            except Exception as play_e:
+                logging.debug(f"  再生再開エラー: {play_e}")
+            # 一時停止の連続検出で空回りしないよう1秒待つ
+            time.sleep(1)
+            elapsed += 1
+            continue
+
+        # 待機チャンク経過：進捗表示して待機を継続
+        consecutive_pauses = 0
+        elapsed += chunk
+        progress = (current_time / duration * 100) if duration else 0
+        logging.info(f"  ⏱️  {label} 再生中: {int(current_time)}/{int(duration)}秒 ({progress:.1f}%)")
+
+    return False
+
+
+# フレーム探索の最大深さ（iframe の入れ子）
+FRAME_SEARCH_DEPTH = 3
+
+# URLパターン -> ビデオ要素を含むフレームのパス（各階層の iframe 番号のリスト）
+_frame_path_cache = {}
+
+
+def _switch_to_frame_path(driver, path):
+    """トップレベルから path の順に iframe を切り替える"""
+    driver.switch_to.default_content()
+    for index in path:
+        frames = driver.find_elements(By.CSS_SELECTOR, 'iframe, frame')
+        if index >= len(frames):
+            return False
+        driver.switch_to.frame(frames[index])
+    return True
+
+
+def _find_video_in_frames(driver, path, depth):
+    """現在のフレーム以下を深さ優先で探索し、video 要素とそのフレームパスを返す"""
+    videos = driver.find_elements(By.TAG_NAME, 'video')
+    if videos:
+        return videos[0], path
+    if depth >= FRAME_SEARCH_DEPTH:
+        return None, None
+
+    frames = driver.find_elements(By.CSS_SELECTOR, 'iframe, frame')
+    for index, frame in enumerate(frames):
+        try:
+            driver.switch_to.frame(frame)
+        except Exception as e:
+            logging.debug(f"  フレーム切り替えエラー（{path + [index]}）: {e}")
+            continue
+        video, found_path = _find_video_in_frames(driver, path + [index], depth + 1)
+        if video is not None:
+            return video, found_path
+        driver.switch_to.parent_frame()
+    return None, None
+
+
+def locate_video(driver, timeout=30, poll_frequency=1):
+    """
+    ビデオ要素を含むフレームに切り替えて video 要素を返す
+
+    同じURLパターンで前回見つかったフレームパスがあれば、探索せずに直接切り替える。
+    なければフレームツリーを深さ優先で探索し（2つ目以降の iframe・入れ子の iframe にも対応）、
+    見つかったパスをキャッシュする。見つからない場合は timeout 秒まで再探索する。
+
+    戻り値: video 要素（見つからない場合は None、ドライバーはトップレベルに戻る）
+    """
+    key = url_pattern(driver.current_url)
+    deadline = time.monotonic() + timeout
+
+    while True:
+        # キャッシュ済みのパスを優先
+        cached = _frame_path_cache.get(key)
+        if cached is not None:
+            try:
+                if _switch_to_frame_path(driver, cached):
+                    videos = driver.find_elements(By.TAG_NAME, 'video')
+                    if videos:
+                        logging.info(f"  ✅ キャッシュ済みのフレーム {cached} でビデオ要素が見つかりました")
+                        return videos[0]
+            except Exception as e:
+                logging.debug(f"  キャッシュ済みフレームへの切り替えエラー: {e}")
+
+        # フレームツリーを探索
+        try:
+            driver.switch_to.default_content()
+            video, path = _find_video_in_frames(driver, [], 0)
+        except Exception as e:
+            logging.debug(f"  フレーム探索エラー: {e}")
+            video, path = None, None
+
+        if video is not None:
+            _frame_path_cache[key] = path
+            where = f"フレーム {path}" if path else "トップレベル"
+            logging.info(f"  ✅ {where} でビデオ要素が見つかりました")
+            return video
+
+        if time.monotonic() >= deadline:
+            try:
+                driver.switch_to.default_content()
+            except Exception:
+                pass
+            return None
+        time.sleep(poll_frequency)
+
+
+def enter_video_frame(driver):
+    """
+    現在のページで前回ビデオ要素が見つかったフレームに切り替え直す
+
+    ウィンドウ（タブ）を切り替えるとトップレベルに戻るため、取得済みの video 要素を
+    再び操作する前に呼ぶ。戻り値: 切り替えられたか
+    """
+    path = _frame_path_cache.get(url_pattern(driver.current_url))
+    if path is None:
+        return False
+    try:
+        return _switch_to_frame_path(driver, path)
+    except Exception as e:
+        logging.debug(f"  フレームへの再切り替えエラー: {e}")
+        return False
+
+
+class VideoLostError(Exception):
+    """ビデオ要素が無効になり、再取得もできなかった"""
+
+
+# 実行全体でのビデオ要素の生存確認イベント数・停止時間（実行結果サマリー用）
+video_events = {'stale': 0, 'reacquired': 0, 'lost': 0, 'stalled_seconds': 0.0}
+
+# ワーカー（タブ・セッション）名ごとの停止時間の累計（ワーカー数の自動調整に使う）
+stalled_by_worker = {}
+
+
+class VideoLiveness:
+    """
+    ビデオ要素の状態取得の連続失敗を数え、必要に応じて要素を再取得する
+
+    StaleElementReferenceException の場合は即座に、それ以外の失敗は
+    max_failures 回連続した時点で再取得する。
+    """
+
+    def __init__(self, max_failures=3, reacquire_timeout=5):
+        self.max_failures = max_failures
+        self.reacquire_timeout = reacquire_timeout
+        self.failures = 0
+
+    def success(self):
+        """状態取得に成功した"""
+        self.failures = 0
+
+    def failure(self, error):
+        """状態取得に失敗した。再取得が必要なら True を返す"""
+        self.failures += 1
+        if isinstance(error, StaleElementReferenceException):
+            return True
+        return self.failures >= self.max_failures
+
+    def reacquire(self, driver):
+        """
+        ビデオ要素を再取得して返す
+
+        例外: 再取得できない場合は VideoLostError（コンテンツ失敗として扱う）
+        """
+        video_events['stale'] += 1
+        logging.warning(f"  ⚠️ ビデオ要素が応答しません（連続失敗 {self.failures}回）。再取得します...")
+        video = locate_video(driver, timeout=self.reacquire_timeout)
+        if video is None:
+            video_events['lost'] += 1
+            raise VideoLostError(f"ビデオ要素を再取得できませんでした（{self.reacquire_timeout}秒）")
+
+        video_events['reacquired'] += 1
+        self.failures = 0
+        logging.info("  ✅ ビデオ要素を再取得しました")
+        try:
+            driver.execute_script("arguments[0].play();", video)
+        except Exception as play_e:
+            logging.debug(f"  再取得後の再生エラー: {play_e}")
+        return video
+
+
+# 停止からの復旧手順（軽いものから順に試す）
+RECOVERY_STEPS = ['play', 'seek', 'reload_source', 'reload_page']
+
+_RECOVERY_LABELS = {
+    'play': '再生を再開',
+    'seek': '少し先にシーク',
+    'reload_source': 'ビデオソースを再読み込み',
+    'reload_page': 'ページを再読み込み',
+}
+
+_STALL_LABELS = {
+    'paused': '一時停止',
+    'rebuffering': '再バッファ',
+    'frozen': '再生位置が進まない',
+    'error': 'エラー',
+}
+
+
+class StallDetector:
+    """
+    再生位置が進まない状態を検出し、停止の種類を判別して復旧手順を選ぶ
+
+    - paused     : 一時停止している
+    - rebuffering: 再生中だが readyState < 3、または waiting/stalled イベントが発生している
+    - frozen     : 再生中・データありなのに再生位置が進まない
+    - error      : MediaError が発生している、または networkState が NO_SOURCE
+    停止が stall_threshold 秒続いたら RECOVERY_STEPS の順に復旧を試み、
+    次の手順までの待ち時間は backoff_base 秒から倍々に延ばす。
+    すべての手順を試した後も再開しない場合は VideoLostError を送出する。
+    エラーの場合は play/seek では直らないため、ソースの再読み込みから始める。
+    """
+
+    def __init__(self, stall_threshold=5, backoff_base=5, worker='main'):
+        self.worker = worker   # stalled_by_worker に記録する名前（ワーカー・タブ・セッション名）
+        self.stall_threshold = stall_threshold
+        self.backoff_base = backoff_base
+        self.stalled_seconds = 0.0   # 現在の停止が続いている秒数
+        self.totals = {kind: 0.0 for kind in _STALL_LABELS}  # 種類ごとの停止時間の合計
+        self.recoveries = 0
+        self._step = 0
+        self._next_action_at = stall_threshold
+        self._last_time = None
+        self._stall_events = None  # 停止開始時点の waiting/stalled イベント数
+
+    @staticmethod
+    def classify(state, buffering_events=0):
+        """停止の種類を判別（buffering_events: 停止中に発生した waiting/stalled イベント数）"""
+        if state.error is not None or state.network_state == 3:
+            return 'error'
+        if state.paused:
+            return 'paused'
+        if state.ready_state < 3 or buffering_events > 0:
+            return 'rebuffering'
+        return 'frozen'
+
+    def observe(self, state, dt):
+        """
+        最新の VideoState と前回からの経過秒数を受け取り、(停止の種類, 復旧手順) を返す
+
+        再生中なら ('playing', None)、停止中で復旧が不要なら (種類, None)
+        例外: 最後の復旧手順の待ち時間が過ぎても再開しない場合は VideoLostError（コンテンツ失敗として扱う）
+        """
+        events = state.waiting_events + state.stalled_events
+        progressed = self._last_time is None or abs(state.current_time - self._last_time) >= 0.5
+        self._last_time = state.current_time
+        if progressed or state.is_finished():
+            if self.stalled_seconds:
+                logging.info(f"  ▶️ 再生が再開しました（停止 {self.stalled_seconds:.0f}秒）")
+            self.stalled_seconds = 0.0
+            self._step = 0
+            self._next_action_at = self.stall_threshold
+            self._stall_events = events
+            return 'playing', None
+
+        if self._stall_events is None:
+            self._stall_events = events
+        kind = self.classify(state, events - self._stall_events)
+        self.stalled_seconds += dt
+        self.totals[kind] += dt
+        stalled_by_worker[self.worker] = stalled_by_worker.get(self.worker, 0.0) + dt
+
+        if kind == 'error':
+            self._step = max(self._step, RECOVERY_STEPS.index('reload_source'))
+        if self.stalled_seconds >= self._next_action_at and self._step >= len(RECOVERY_STEPS):
+            # 最後の手順（ページの再読み込み）の後も待ち時間内に再開しなかった
+            raise VideoLostError(f"復旧手順をすべて試しても再生が再開しませんでした（停止 {self.stalled_seconds:.0f}秒, {_STALL_LABELS[kind]}）")
+        if self.stalled_seconds >= self._next_action_at:
+            action = RECOVERY_STEPS[self._step]
+            self._step += 1
+            self._next_action_at = self.stalled_seconds + self.backoff_base * (2 ** self._step)
+            self.recoveries += 1
+            return kind, action
+        return kind, None
+
+    def total_stalled(self):
+        """停止時間の合計秒数"""
+        return sum(self.totals.values())
+
+    def summary(self):
+        """種類ごとの停止時間を文字列で返す"""
+        parts = [f"{_STALL_LABELS[kind]} {seconds:.0f}秒" for kind, seconds in self.totals.items() if seconds]
+        return f"{self.total_stalled():.0f}秒（{', '.join(parts) or 'なし'}, 復旧操作 {self.recoveries}回）"
+
+
+def recover_video(driver, video, kind, action, position):
+    """
+    復旧手順 action を実行し、（再読み込み後の）video 要素を返す
+
+    position: 停止時点の再生位置（ページ再読み込み後にその位置から再開する）
+    """
+    logging.warning(f"  ⚠️ ビデオが停止しています（{_STALL_LABELS.get(kind, kind)}）。{_RECOVERY_LABELS[action]}します...")
+    try:
+        if action == 'play':
+            driver.execute_script("arguments[0].play();", video)
+        elif action == 'seek':
+            driver.execute_script(
+                "arguments[0].currentTime = arguments[0].currentTime + 0.5; arguments[0].play();", video
+            )
+        elif action == 'reload_source':
+            driver.execute_script(
+                """
+                const video = arguments[0];
+                const position = arguments[1];
+                video.addEventListener('loadedmetadata', () => {
+                    video.currentTime = position;
+                    video.play();
+                }, {once: true});
+                video.load();
+                """,
+                video, position,
+            )
+        elif action == 'reload_page':
+            driver.switch_to.default_content()
+            driver.refresh()
+            new_video = locate_video(driver, timeout=30)
+            if new_video is None:
+                raise VideoLostError("ページ再読み込み後にビデオ要素が見つかりません")
+            driver.execute_script(
+                "arguments[0].currentTime = arguments[1]; arguments[0].play();", new_video, position
+            )
+            return new_video
+    except VideoLostError:
+        raise
+    except Exception as e:
+        logging.debug(f"  復旧操作エラー（{action}）: {e}")
+    return video
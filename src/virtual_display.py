@@ -0,0 +1,171 @@
+"""
+Xvfb 仮想ディスプレイ管理
+
+画面のない Linux サーバーでも、ヘッドレスにせず通常の Chrome を動かすためのモジュール
+- 全ワーカーで1つのディスプレイを共有するか、ワーカーごとに1つずつ起動する
+- 解像度・色深度は設定で変更できる（例: 1920x1080x24）
+- 終了時にすべての Xvfb を停止し、前回の実行が異常終了して残った Xvfb も起動時に片付ける
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import shutil
+import signal
+import logging
+import subprocess
+import threading
+from process_utils import pid_exists
+
+
+# 起動中の Xvfb を記録するディレクトリ（異常終了後の片付けに使う）
+STATE_DIR = os.path.join('/tmp', 'contents_engine_xvfb')
+
+# 空きディスプレイ番号を探し始める番号
+FIRST_DISPLAY = 90
+
+
+def _is_xvfb(pid):
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return b'Xvfb' in f.read()
+    except OSError:
+        return False
+
+
+def _display_in_use(number):
+    return os.path.exists(f'/tmp/.X{number}-lock') or os.path.exists(f'/tmp/.X11-unix/X{number}')
+
+
+def cleanup_stale_displays():
+    """前回の実行が異常終了して残った Xvfb を停止する（起動したプロセスが既に存在しないもの）"""
+    if not os.path.isdir(STATE_DIR):
+        return 0
+    cleaned = 0
+    for entry in os.listdir(STATE_DIR):
+        path = os.path.join(STATE_DIR, entry)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception:
+            continue
+        if pid_exists(state['owner_pid']):
+            continue
+        if pid_exists(state['xvfb_pid']) and _is_xvfb(state['xvfb_pid']):
+            try:
+                os.kill(state['xvfb_pid'], signal.SIGTERM)
+                cleaned += 1
+            except OSError as e:
+                logging.debug(f"残っている Xvfb の停止エラー: {e}")
+        for leftover in (path, f"/tmp/.X{state['display']}-lock"):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+    if cleaned:
+        logging.info(f"🧹 前回の実行で残った仮想ディスプレイを {cleaned} 個停止しました")
+    return cleaned
+
+
+class VirtualDisplay:
+    """1つの Xvfb プロセス"""
+
+    def __init__(self, number, geometry):
+        self.number = number
+        self.geometry = geometry
+        self.process = None
+
+    @property
+    def name(self):
+        return f':{self.number}'
+
+    @property
+    def window_size(self):
+        """Chrome の --window-size に渡す "幅,高さ" """
+        width, height = self.geometry.split('x')[:2]
+        return f"{width},{height}"
+
+    @property
+    def _state_path(self):
+        return os.path.join(STATE_DIR, f'{self.number}.json')
+
+    def start(self, timeout=10):
+        """Xvfb を起動し、接続できるようになるまで待つ"""
+        self.process = subprocess.Popen(
+            ['Xvfb', self.name, '-screen', '0', self.geometry, '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(self._state_path, 'w', encoding='utf-8') as f:
+            json.dump({'display': self.number, 'xvfb_pid': self.process.pid, 'owner_pid': os.getpid()}, f)
+
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(f'/tmp/.X11-unix/X{self.number}'):
+            if self.process.poll() is not None or time.monotonic() >= deadline:
+                self.stop()
+                raise RuntimeError(f"Xvfb {self.name} を起動できませんでした")
+            time.sleep(0.1)
+        logging.info(f"🖥️  仮想ディスプレイ {self.name}（{self.geometry}）を起動しました")
+
+    def stop(self):
+        """Xvfb を停止して記録を削除する"""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        try:
+            os.remove(self._state_path)
+        except OSError:
+            pass
+
+
+class DisplayPool:
+    """
+    ワーカーに仮想ディスプレイを割り当てる
+
+    mode: 'shared'（全ワーカーで1つ）または 'per_worker'（ワーカーごとに1つ）
+    """
+
+    def __init__(self, mode='shared', geometry='1920x1080x24'):
+        self.mode = mode
+        self.geometry = geometry
+        self._displays = {}
+        self._lock = threading.Lock()
+        self._next_number = FIRST_DISPLAY
+        self._cleaned = False
+        atexit.register(self.close)
+
+    @staticmethod
+    def available():
+        """仮想ディスプレイを使える環境か（Linux で Xvfb がインストールされている）"""
+        return sys.platform.startswith('linux') and shutil.which('Xvfb') is not None
+
+    def acquire(self, worker_name):
+        """worker_name 用の仮想ディスプレイを返す（なければ起動する）"""
+        key = 'shared' if self.mode == 'shared' else worker_name
+        with self._lock:
+            if not self._cleaned:
+                cleanup_stale_displays()
+                self._cleaned = True
+            display = self._displays.get(key)
+            if display is None:
+                while _display_in_use(self._next_number):
+                    self._next_number += 1
+                display = VirtualDisplay(self._next_number, self.geometry)
+                self._next_number += 1
+                display.start()
+                self._displays[key] = display
+            return display
+
+    def close(self):
+        """起動したすべての仮想ディスプレイを停止する"""
+        with self._lock:
+            for display in self._displays.values():
+                display.stop()
+            if self._displays:
+                logging.info(f"🖥️  仮想ディスプレイを {len(self._displays)} 個停止しました")
+            self._displays = {}
@@ -0,0 +1,125 @@
+"""
+条件待機ポリシー
+
+固定の time.sleep() を「準備完了の条件＋タイムアウト」に置き換えるためのモジュール
+- 条件が満たされた時点ですぐに次へ進む
+- 従来の固定待機時間と比較して、短縮できた秒数を集計する
+"""
+
+import time
+import logging
+import threading
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+
+# 条件の確認間隔（秒）
+POLL_FREQUENCY = 0.2
+
+
+class WaitPolicy:
+    """固定待機を条件待機に置き換え、待機ごとの実績を集計する"""
+
+    def __init__(self):
+        # 待機名 -> {'count', 'waited', 'baseline', 'timeouts'}
+        self.stats = {}
+        # 複数ワーカーから同時に集計されるためロックで保護
+        self._lock = threading.Lock()
+
+    def wait(self, driver, name, condition, baseline, timeout=None):
+        """
+        condition(driver) が真になるまで待機
+
+        name: 集計用の待機名
+        baseline: 置き換え前の固定待機秒数（短縮時間の計算に使う）
+        timeout: 最大待機秒数（省略時は baseline と同じ＝従来より遅くならない）
+        戻り値: True=条件成立, False=タイムアウト（従来通り処理は続行する）
+        """
+        if timeout is None:
+            timeout = baseline
+
+        start = time.monotonic()
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+            ok = True
+        except TimeoutException:
+            ok = False
+            logging.debug(f"  条件待機タイムアウト: {name}（{timeout}秒）")
+        except Exception as e:
+            ok = False
+            logging.debug(f"  条件待機エラー: {name}: {e}")
+        waited = time.monotonic() - start
+
+        with self._lock:
+            entry = self.stats.setdefault(name, {'count': 0, 'waited': 0.0, 'baseline': 0.0, 'timeouts': 0})
+            entry['count'] += 1
+            entry['waited'] += waited
+            entry['baseline'] += baseline
+            if not ok:
+                entry['timeouts'] += 1
+        return ok
+
+    def total_saved(self):
+        """固定待機と比べて短縮できた合計秒数"""
+        return sum(e['baseline'] - e['waited'] for e in self.stats.values())
+
+    def total_count(self):
+        """条件待機の合計回数"""
+        return sum(e['count'] for e in self.stats.values())
+
+    def summary_lines(self):
+        """待機名ごとの集計結果を文字列のリストで返す"""
+        lines = []
+        for name, e in self.stats.items():
+            saved = e['baseline'] - e['waited']
+            lines.append(
+                f"   {name}: {e['count']}回, 実待機 {e['waited']:.1f}秒 / 従来 {e['baseline']:.1f}秒"
+                f"（短縮 {saved:.1f}秒, タイムアウト {e['timeouts']}回）"
+            )
+        return lines
+
+
+# ---- 準備完了条件（WebDriverWait.until に渡す関数を返す） ----
+
+def url_changed(old_url):
+    """URL が old_url から変わった"""
+    return lambda driver: driver.current_url != old_url
+
+
+def new_window_or_url_changed(old_url, old_handle_count):
+    """新しいウィンドウが開いたか、URL が変わった"""
+    return lambda driver: len(driver.window_handles) > old_handle_count or driver.current_url != old_url
+
+
+def document_ready():
+    """現在のドキュメント（iframe 内を含む）の読み込みが完了した"""
+    return lambda driver: driver.execute_script("return document.readyState") == 'complete'
+
+
+def media_present():
+    """ページ内に video 要素または iframe が現れた"""
+    return EC.presence_of_element_located((By.CSS_SELECTOR, 'video, iframe'))
+
+
+def video_ready(video, min_ready_state=2):
+    """ビデオの readyState が min_ready_state 以上になった（2 = 現在位置のデータあり）"""
+    return lambda driver: (driver.execute_script("return arguments[0].readyState;", video) or 0) >= min_ready_state
+
+
+def video_playing(video):
+    """ビデオが再生中（一時停止しておらず、再生位置が進んでいる）"""
+    return lambda driver: driver.execute_script(
+        "return !arguments[0].paused && arguments[0].currentTime > 0;", video
+    )
+
+
+def listing_ready():
+    """セクション一覧（「受講する」ボタン）が表示された"""
+    return EC.presence_of_all_elements_located((By.XPATH, '//button[contains(text(), "受講する")]'))
+
+
+def navigated_away(element, old_url):
+    """クリックした要素が画面から消えたか、URL が変わった（ページ遷移の完了）"""
+    return EC.any_of(EC.staleness_of(element), url_changed(old_url))
@@ -0,0 +1,203 @@
+"""
+SQLite ワークキュー
+
+セクション（URL が分かればコンテンツ単位も可）を作業単位として SQLite に記録し、
+複数のプロセス・複数のマシン（共有ディレクトリ上の DB）で重複なく分担するためのモジュール
+- 作業単位は有効期限付きでリースし、処理中はハートビートで期限を延長する
+- プロセスが落ちてハートビートが止まると、期限切れのリースは再び取得できるようになる
+- 失敗した作業単位は max_attempts 回まで再取得できる（使い切ると EXHAUSTED を返し、失敗として扱う）
+
+ネットワーク共有上で使う場合は、SQLite のファイルロックが正しく動作するファイルシステムであること。
+"""
+
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+
+
+WORK_QUEUE_LEASE_SECONDS = 120
+
+# acquire() の戻り値: 再試行回数を使い切った作業単位（他のプロセスの担当と区別する）
+EXHAUSTED = 'exhausted'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    course        TEXT NOT NULL,
+    unit          TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',  -- pending / leased / done / failed
+    owner         TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    updated       REAL,
+    PRIMARY KEY (course, unit)
+)
+"""
+
+
+def default_owner():
+    """このプロセスを表すリース所有者名（ホスト名:PID）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Lease:
+    """取得したリース（バックグラウンドでハートビートを送り、finish() で解放する）"""
+
+    def __init__(self, queue, owner, unit, ttl):
+        self.queue = queue
+        self.owner = owner
+        self.unit = unit
+        self.ttl = ttl
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name=f'lease-{unit}', daemon=True)
+        self._thread.start()
+
+    def _heartbeat(self):
+        # 期限の 1/3 ごとに延長する（2回続けて失敗しても期限内に再送できる）
+        while not self._stop.wait(self.ttl / 3):
+            if not self.queue.heartbeat(self.owner, self.unit, self.ttl):
+                self.lost = True
+                logging.warning(f"⚠️ {self.unit} のリースが失われました（他のプロセスに引き継がれた可能性）")
+                return
+
+    def finish(self, ok):
+        """ハートビートを止めて結果を記録する"""
+        self._stop.set()
+        self._thread.join()
+        self.queue.release(self.owner, self.unit, ok)
+
+
+class WorkQueue:
+    """コースごとの作業単位とリースを SQLite で管理する"""
+
+    def __init__(self, path, course, lease_seconds=WORK_QUEUE_LEASE_SECONDS, max_attempts=3):
+        self.path = path
+        self.course = course
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        # スレッド・プロセス間で共有しないよう、操作ごとに接続する
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _transaction(self, func):
+        """書き込みロックを取った上で func(conn) を実行する"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(conn)
+                conn.execute('COMMIT')
+                return result
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    def add(self, units):
+        """作業単位を登録（登録済みのものはそのまま）"""
+        now = time.time()
+        self._transaction(lambda conn: conn.executemany(
+            'INSERT OR IGNORE INTO units (course, unit, updated) VALUES (?, ?, ?)',
+            [(self.course, unit, now) for unit in units],
+        ))
+
+    def acquire(self, owner, unit, ttl=None):
+        """
+        unit のリースを取得する
+
+        未着手・期限切れ・再試行可能な失敗の場合のみ取得でき、Lease を返す。
+        期限切れのリース（処理中のプロセスが落ちたもの）は試行回数に関係なく取得できる。
+        再試行回数を使い切って失敗した場合は EXHAUSTED、
+        完了済みや他のプロセスが処理中の場合は None を返す。
+        """
+        ttl = ttl or self.lease_seconds
+
+        def take(conn):
+            now = time.time()
+            conn.execute(
+                'INSERT OR IGNORE INTO units (course, unit, updated) VALUES (?, ?, ?)',
+                (self.course, unit, now),
+            )
+            cursor = conn.execute(
+                """UPDATE units SET status = 'leased', owner = ?, lease_expires = ?,
+                          attempts = attempts + 1, updated = ?
+                   WHERE course = ? AND unit = ? AND (
+                         (status = 'pending' AND attempts < ?)
+                         OR (status = 'leased' AND lease_expires < ?))""",
+                (owner, now + ttl, now, self.course, unit, self.max_attempts, now),
+            )
+            if cursor.rowcount == 1:
+                return True
+            status, attempts = conn.execute(
+                'SELECT status, attempts FROM units WHERE course = ? AND unit = ?', (self.course, unit),
+            ).fetchone()
+            if status == 'failed' or (status == 'pending' and attempts >= self.max_attempts):
+                return EXHAUSTED
+            return False
+
+        result = self._transaction(take)
+        if result is EXHAUSTED:
+            return EXHAUSTED
+        if not result:
+            return None
+        return Lease(self, owner, unit, ttl)
+
+    def heartbeat(self, owner, unit, ttl=None):
+        """リースの期限を延長する（まだ自分が所有している場合のみ True）"""
+        ttl = ttl or self.lease_seconds
+        try:
+            return self._transaction(lambda conn: conn.execute(
+                """UPDATE units SET lease_expires = ?, updated = ?
+                   WHERE course = ? AND unit = ? AND owner = ? AND status = 'leased'""",
+                (time.time() + ttl, time.time(), self.course, unit, owner),
+            ).rowcount == 1)
+        except sqlite3.Error as e:
+            # 一時的なロック競合ではリースを失ったとみなさない
+            logging.debug(f"ハートビート送信エラー: {e}")
+            return True
+
+    def release(self, owner, unit, ok):
+        """結果を記録してリースを解放（失敗は上限回数まで pending に戻す）"""
+        def update(conn):
+            conn.execute(
+                """UPDATE units SET status = CASE
+                          WHEN ? THEN 'done'
+                          WHEN attempts < ? THEN 'pending'
+                          ELSE 'failed' END,
+                          owner = NULL, lease_expires = NULL, updated = ?
+                   WHERE course = ? AND unit = ? AND owner = ?""",
+                (1 if ok else 0, self.max_attempts, time.time(), self.course, unit, owner),
+            )
+        try:
+            self._transaction(update)
+        except sqlite3.Error as e:
+            logging.error(f"ワークキュー更新エラー（{unit}）: {e}")
+
+    def done_units(self):
+        """完了済みの作業単位のリスト"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT unit FROM units WHERE course = ? AND status = 'done'", (self.course,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def reset(self):
+        """
+        このコースの完了済み・失敗した作業単位を未着手に戻す
+
+        他のプロセスが処理中のリースはそのまま残す（期限が切れれば再び取得できる）。
+        """
+        self._transaction(lambda conn: conn.execute(
+            """UPDATE units SET status = 'pending', owner = NULL, lease_expires = NULL,
+                      attempts = 0, updated = ?
+               WHERE course = ? AND status IN ('done', 'failed')""",
+            (time.time(), self.course),
+        ))
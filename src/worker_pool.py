@@ -0,0 +1,143 @@
+"""
+マルチブラウザ ワーカープール
+
+複数の Chrome セッションを立ち上げ、共有キューからセクションを取り出して並行に再生する
+- ワーカーごとにログファイルを出力
+- ガバナーを指定すると、ホストの状態に応じてワーカー数を増減する
+- 結果はセクション番号ごとに集約し、呼び出し側のサマリーに統合する
+"""
+
+import queue
+import logging
+import threading
+
+
+LOG_FORMAT_WITH_WORKER = '%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s'
+
+
+class _ThreadNameFilter(logging.Filter):
+    """指定したスレッドのログだけを通すフィルタ"""
+
+    def __init__(self, thread_name):
+        super().__init__()
+        self.thread_name = thread_name
+
+    def filter(self, record):
+        return record.threadName == self.thread_name
+
+
+def _add_worker_log_handler(name, log_file):
+    """ワーカー専用のログファイルハンドラを追加"""
+    handler = logging.FileHandler(log_file, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handler.addFilter(_ThreadNameFilter(name))
+    logging.getLogger().addHandler(handler)
+    return handler
+
+
+def run_worker_pool(sections, worker_count, create_driver, run_section, first_driver=None, log_prefix='automation',
+                    governor=None):
+    """
+    sections を worker_count 個のブラウザで並行に再生する
+
+    sections: 再生するセクション番号のリスト（この順にキューへ入れる）
+    create_driver(name): ログイン済みのドライバーを返す（失敗時は None）
+    run_section(driver, section_index, position, name): セクションを再生して成否を返す（name はワーカー名）
+    first_driver: 既に起動・ログイン済みのドライバー（1つ目のワーカーが使う）
+    log_prefix: ワーカーごとのログファイル名の接頭辞（{log_prefix}_worker-N.log）
+    governor: ResourceGovernor（指定時は governor.min_workers 個から始め、
+              worker_count 個までの範囲で計測結果に応じて増減する）
+
+    戻り値: {セクション番号: run_section の戻り値} の辞書（どのワーカーも処理できなかったセクションは False）
+    """
+    work = queue.Queue()
+    for position, section_index in enumerate(sections, 1):
+        work.put((position, section_index))
+
+    results = {}
+    results_lock = threading.Lock()
+    stop_event = threading.Event()
+
+    # メインログにもワーカー名を出力
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT_WITH_WORKER))
+
+    def worker(name, driver, retire):
+        log_handler = _add_worker_log_handler(name, f'{log_prefix}_{name}.log')
+        try:
+            if driver is None:
+                logging.info(f"🚀 {name}: ブラウザを起動します...")
+                driver = create_driver(name)
+            if driver is None:
+                logging.error(f"❌ {name}: ブラウザの起動またはログインに失敗しました")
+                return
+
+            while not stop_event.is_set() and not retire.is_set():
+                try:
+                    position, section_index = work.get_nowait()
+                except queue.Empty:
+                    break
+                logging.info(f"📋 {name}: セクション {section_index} を担当します")
+                try:
+                    ok = run_section(driver, section_index, position, name)
+                except Exception as e:
+                    logging.error(f"❌ {name}: セクション {section_index} でエラー: {e}")
+                    ok = False
+                with results_lock:
+                    results[section_index] = ok
+            if retire.is_set():
+                logging.info(f"✅ {name}: ワーカー数の削減により終了します")
+            else:
+                logging.info(f"✅ {name}: 担当セクションがなくなったので終了します")
+        finally:
+            if driver:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            logging.getLogger().removeHandler(log_handler)
+            log_handler.close()
+
+    threads = []
+    retire_events = []
+
+    def start_worker():
+        i = len(threads)
+        name = f'worker-{i + 1}'
+        retire = threading.Event()
+        thread = threading.Thread(
+            target=worker, args=(name, first_driver if i == 0 else None, retire), name=name, daemon=True
+        )
+        threads.append(thread)
+        retire_events.append(retire)
+        thread.start()
+
+    if governor:
+        governor.max_workers = min(governor.max_workers, worker_count)
+        initial = min(governor.min_workers, worker_count)
+    else:
+        initial = worker_count
+    for _ in range(initial):
+        start_worker()
+
+    try:
+        # join(timeout) でループし、Ctrl+C をメインスレッドで受け取れるようにする
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=1)
+            # 残りのセクションがある間だけワーカー数を調整する
+            if governor and governor.due() and not work.empty():
+                active = [i for i, t in enumerate(threads) if t.is_alive() and not retire_events[i].is_set()]
+                target = governor.decide(len(active)) if active else len(active)
+                if target > len(active):
+                    start_worker()
+                elif target < len(active):
+                    # 最後に起動したワーカーを、担当中のセクションが終わり次第終了させる
+                    retire_events[active[-1]].set()
+    except KeyboardInterrupt:
+        stop_event.set()
+        raise
+
+    for section_index in sections:
+        results.setdefault(section_index, False)
+    return results